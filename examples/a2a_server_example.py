@@ -49,19 +49,6 @@ app = KiboAgentA2A(
 )
 
 
-def _extract_llm_usage(ai_message) -> LLMUsage:
-    """Extract LLM usage metadata from a LangChain AIMessage."""
-    usage_meta = getattr(ai_message, "usage_metadata", None) or {}
-    resp_meta = getattr(ai_message, "response_metadata", {})
-    return LLMUsage(
-        model=resp_meta.get("model_name"),
-        provider="openai",
-        input_tokens=usage_meta.get("input_tokens"),
-        output_tokens=usage_meta.get("output_tokens"),
-        total_tokens=usage_meta.get("total_tokens"),
-    )
-
-
 @app.executor
 class ChatAgent(AgentExecutor):
     async def execute(self, context, event_queue):
@@ -73,7 +60,7 @@ class ChatAgent(AgentExecutor):
         )
         last_message = result["messages"][-1]
 
-        usage = _extract_llm_usage(last_message)
+        usage = LLMUsage.from_ai_message(last_message, provider="openai")
         app.logger.log(logging.INFO, "LLM response received", extra={"llm_usage": usage})
 
         await event_queue.enqueue_event(
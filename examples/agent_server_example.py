@@ -46,26 +46,13 @@ graph_builder.add_edge(START, "chatbot")
 graph = graph_builder.compile()
 
 
-def _extract_llm_usage(ai_message) -> LLMUsage:
-    """Extract LLM usage metadata from a LangChain AIMessage."""
-    usage_meta = getattr(ai_message, "usage_metadata", None) or {}
-    resp_meta = getattr(ai_message, "response_metadata", {})
-    return LLMUsage(
-        model=resp_meta.get("model_name"),
-        provider="openai",
-        input_tokens=usage_meta.get("input_tokens"),
-        output_tokens=usage_meta.get("output_tokens"),
-        total_tokens=usage_meta.get("total_tokens"),
-    )
-
-
 @app.entrypoint
 async def invoke(payload, context):
     prompt = payload.get("prompt", "")
     result = await graph.ainvoke({"messages": [{"role": "user", "content": prompt}]})
     last_message = result["messages"][-1]
 
-    usage = _extract_llm_usage(last_message)
+    usage = LLMUsage.from_ai_message(last_message, provider="openai")
     context._llm_usage = usage
 
     return {
@@ -21,13 +21,24 @@ from kiboup import KiboAgentClient
 
 SERVER_URL = "http://localhost:8080"
 API_KEY = "sk-chat-abc"
+MAX_HISTORY_MESSAGES = 20
 
 
 @cl.on_chat_start
 async def on_start():
+    client = KiboAgentClient(SERVER_URL, api_key=API_KEY)
+    await client.__aenter__()
+    cl.user_session.set("client", client)
     cl.user_session.set("history", [])
 
 
+@cl.on_chat_end
+async def on_end():
+    client = cl.user_session.get("client")
+    if client is not None:
+        await client.__aexit__(None, None, None)
+
+
 @cl.on_message
 async def on_message(message: cl.Message):
     history = cl.user_session.get("history", [])
@@ -36,17 +47,17 @@ async def on_message(message: cl.Message):
     response = cl.Message(content="")
     await response.send()
 
-    full_response = ""
-    async with KiboAgentClient(SERVER_URL, api_key=API_KEY) as client:
-        async for chunk in client.stream({
-            "prompt": message.content,
-            "messages": history,
-        }):
-            token = chunk.get("token")
-            if token:
-                full_response += token
-                await response.stream_token(token)
+    client = cl.user_session.get("client")
+    parts: list[str] = []
+    async for chunk in client.stream({
+        "prompt": message.content,
+        "messages": history,
+    }):
+        token = chunk.get("tokens") or chunk.get("token")
+        if token:
+            parts.append(token)
+            await response.stream_token(token)
 
     await response.update()
-    history.append({"role": "assistant", "content": full_response})
-    cl.user_session.set("history", history)
+    history.append({"role": "assistant", "content": "".join(parts)})
+    cl.user_session.set("history", history[-MAX_HISTORY_MESSAGES:])
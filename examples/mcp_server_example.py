@@ -1,6 +1,8 @@
 """Example: KiboAgentMcp with LangGraph + OpenAI GPT-4o-mini.
 
-Demonstrates LLMUsage logging with token consumption data.
+Demonstrates LLMUsage logging with token consumption data. Tool
+responses are kept in a small in-process LRU keyed on the normalized
+input, so repeated questions skip the LLM call entirely.
 
 Run:
     OPENAI_API_KEY=sk-... uv run python examples/mcp_server_example.py
@@ -8,7 +10,9 @@ Run:
 Test with MCP Inspector or any MCP client.
 """
 
+import hashlib
 import logging
+from collections import OrderedDict
 
 from langchain_openai import ChatOpenAI
 from langgraph.graph import START, MessagesState, StateGraph
@@ -37,40 +41,70 @@ app = KiboAgentMcp(
 )
 
 
-def _extract_llm_usage(ai_message) -> LLMUsage:
-    """Extract LLM usage metadata from a LangChain AIMessage."""
-    usage_meta = getattr(ai_message, "usage_metadata", None) or {}
-    resp_meta = getattr(ai_message, "response_metadata", {})
-    return LLMUsage(
-        model=resp_meta.get("model_name"),
-        provider="openai",
-        input_tokens=usage_meta.get("input_tokens"),
-        output_tokens=usage_meta.get("output_tokens"),
-        total_tokens=usage_meta.get("total_tokens"),
+_CACHE_MAX = 1024
+_cache: OrderedDict[str, str] = OrderedDict()
+_cache_stats = {"hits": 0, "misses": 0}
+
+
+def _cache_key(tool: str, text: str) -> str:
+    normalized = f"{tool}\x00{text.strip().lower()}"
+    return hashlib.blake2b(normalized.encode(), digest_size=16).hexdigest()
+
+
+def _cache_get(key: str) -> str | None:
+    answer = _cache.get(key)
+    if answer is None:
+        _cache_stats["misses"] += 1
+        return None
+    _cache.move_to_end(key)
+    _cache_stats["hits"] += 1
+    app.logger.log(
+        logging.INFO,
+        "LLM cache hit (hits=%d, misses=%d)" % (_cache_stats["hits"], _cache_stats["misses"]),
     )
+    return answer
+
+
+def _cache_put(key: str, answer: str):
+    _cache[key] = answer
+    _cache.move_to_end(key)
+    if len(_cache) > _CACHE_MAX:
+        _cache.popitem(last=False)
 
 
 @app.tool()
 async def ask(question: str) -> str:
     """Ask a question to the LangGraph agent powered by GPT-4o-mini."""
+    key = _cache_key("ask", question)
+    cached = _cache_get(key)
+    if cached is not None:
+        return cached
+
     result = await graph.ainvoke(
         {"messages": [{"role": "user", "content": question}]}
     )
     last_message = result["messages"][-1]
-    usage = _extract_llm_usage(last_message)
+    usage = LLMUsage.from_ai_message(last_message, provider="openai")
     app.logger.log(logging.INFO, "LLM response received", extra={"llm_usage": usage})
+    _cache_put(key, last_message.content)
     return last_message.content
 
 
 @app.tool()
-def summarize(text: str) -> str:
+async def summarize(text: str) -> str:
     """Summarize the given text using GPT-4o-mini."""
-    result = graph.invoke(
+    key = _cache_key("summarize", text)
+    cached = _cache_get(key)
+    if cached is not None:
+        return cached
+
+    result = await graph.ainvoke(
         {"messages": [{"role": "user", "content": f"Summarize this text:\n\n{text}"}]}
     )
     last_message = result["messages"][-1]
-    usage = _extract_llm_usage(last_message)
+    usage = LLMUsage.from_ai_message(last_message, provider="openai")
     app.logger.log(logging.INFO, "LLM response received", extra={"llm_usage": usage})
+    _cache_put(key, last_message.content)
     return last_message.content
 
 
@@ -29,19 +29,6 @@ from kiboup import KiboAgentApp, KiboAgentClient, LLMUsage
 MTLS_PORT = 8443
 
 
-def _extract_llm_usage(ai_message) -> LLMUsage:
-    """Extract LLM usage metadata from a LangChain AIMessage."""
-    usage_meta = getattr(ai_message, "usage_metadata", None) or {}
-    resp_meta = getattr(ai_message, "response_metadata", {})
-    return LLMUsage(
-        model=resp_meta.get("model_name"),
-        provider="openai",
-        input_tokens=usage_meta.get("input_tokens"),
-        output_tokens=usage_meta.get("output_tokens"),
-        total_tokens=usage_meta.get("total_tokens"),
-    )
-
-
 def run_server():
     """Start an HTTPS server with mTLS enabled and LangGraph + OpenAI."""
     app = KiboAgentApp()
@@ -63,7 +50,7 @@ def run_server():
         result = await graph.ainvoke({"messages": [{"role": "user", "content": prompt}]})
         last_message = result["messages"][-1]
 
-        usage = _extract_llm_usage(last_message)
+        usage = LLMUsage.from_ai_message(last_message, provider="openai")
         context._llm_usage = usage
 
         return {
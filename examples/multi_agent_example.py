@@ -26,45 +26,102 @@ Prerequisites:
 
 import argparse
 import asyncio
+import functools
+import hashlib
 
 import httpx
 from langchain_openai import ChatOpenAI
+from langgraph.cache.memory import InMemoryCache
 from langgraph.graph import START, MessagesState, StateGraph
+from langgraph.types import CachePolicy
 
 from kiboup import KiboAgentApp
 from kiboup.shared.entities import LLMUsage
 from kiboup.studio import StudioClient
 
+try:
+    from blake3 import blake3 as _hash
+except ImportError:
+    _hash = functools.partial(hashlib.blake2b, digest_size=16)
+
 STUDIO_URL = "http://127.0.0.1:8000"
 
+# Shared HTTP client for agent-to-agent delegation. Built once at startup
+# so every call reuses pooled keep-alive connections.
+_HTTP: httpx.AsyncClient | None = None
+
 
 # ---------------------------------------------------------------------------
-# Agent A: Researcher - uses LLM to research, then delegates to writer
+# Graphs - one shared LLM client, graphs compiled once per system prompt
 # ---------------------------------------------------------------------------
 
-def _build_researcher_graph():
-    llm = ChatOpenAI(model="gpt-4o-mini")
+# A single ChatOpenAI instance keeps one HTTP pool and tokenizer cache
+# for every graph in the process.
+LLM = ChatOpenAI(model="gpt-4o-mini", max_retries=2, timeout=60)
+
+RESEARCHER_SYSTEM = (
+    "You are a research assistant. Given a topic, produce a concise "
+    "but thorough research summary with key facts, context, and "
+    "relevant data points. Output raw findings only, no formatting."
+)
+
+WRITER_SYSTEM = (
+    "You are a professional writer. You receive raw research "
+    "findings and transform them into a well-structured, "
+    "clear and engaging response using markdown formatting. "
+    "Include headers, bullet points, and a summary section."
+)
+
+
+def msg_key(messages: list[dict]) -> bytes:
+    """Content-address a message list as a 16-byte digest.
+
+    Each message contributes ``role\\x00content\\x01``; BLAKE3 is used
+    when the ``blake3`` package is installed, BLAKE2b otherwise.
+    """
+    buf = bytearray()
+    for msg in messages:
+        content = msg["content"]
+        if not isinstance(content, str):
+            content = str(content)
+        buf += msg["role"].encode("utf-8", "replace")
+        buf += b"\x00"
+        buf += content.encode("utf-8", "replace")
+        buf += b"\x01"
+    return _hash(buf).digest()[:16]
+
+
+def _messages_cache_key(state: MessagesState) -> bytes:
+    """Cache key for LangGraph nodes over the state's message history."""
+    return msg_key(
+        [{"role": msg.type, "content": msg.content} for msg in state["messages"]]
+    )
+
+
+@functools.lru_cache(maxsize=8)
+def _get_graph(system: str, node: str, llm: ChatOpenAI = LLM):
+    system_msg = {"role": "system", "content": system}
     builder = StateGraph(MessagesState)
 
-    def research(state: MessagesState):
-        system = {
-            "role": "system",
-            "content": (
-                "You are a research assistant. Given a topic, produce a concise "
-                "but thorough research summary with key facts, context, and "
-                "relevant data points. Output raw findings only, no formatting."
-            ),
-        }
-        return {"messages": [llm.invoke([system] + state["messages"])]}
+    def call_model(state: MessagesState):
+        return {"messages": [llm.invoke([system_msg] + state["messages"])]}
 
-    builder.add_node("research", research)
-    builder.add_edge(START, "research")
-    return builder.compile()
+    builder.add_node(
+        node,
+        call_model,
+        cache_policy=CachePolicy(key_func=_messages_cache_key, ttl=3600),
+    )
+    builder.add_edge(START, node)
+    return builder.compile(cache=InMemoryCache())
 
 
+# ---------------------------------------------------------------------------
+# Agent A: Researcher - uses LLM to research, then delegates to writer
+# ---------------------------------------------------------------------------
+
 def create_researcher():
     app = KiboAgentApp()
-    graph = _build_researcher_graph()
+    graph = _get_graph(RESEARCHER_SYSTEM, "research")
 
     studio = StudioClient(
         studio_url=STUDIO_URL,
@@ -75,13 +132,41 @@ def create_researcher():
     )
     app.attach_studio(studio)
 
+    @app.on_startup
+    async def _open_http():
+        global _HTTP
+        _HTTP = httpx.AsyncClient(
+            timeout=httpx.Timeout(60.0),
+            limits=httpx.Limits(max_keepalive_connections=64, max_connections=128),
+            http2=True,
+        )
+
+    @app.on_shutdown
+    async def _close_http():
+        global _HTTP
+        if _HTTP is not None:
+            await _HTTP.aclose()
+            _HTTP = None
+
     @app.entrypoint
     async def invoke(payload, context):
         prompt = payload.get("prompt", "")
 
-        result = await graph.ainvoke(
-            {"messages": [{"role": "user", "content": prompt}]}
+        # The LLM call is the long pole; start the Studio lookups alongside
+        # it so they are already resolved when the research comes back.
+        llm_task = asyncio.create_task(
+            graph.ainvoke({"messages": [{"role": "user", "content": prompt}]})
         )
+        studio_task = asyncio.gather(
+            studio.is_flag_enabled("delegate_to_writer"),
+            studio.get_param("writer_style", default="markdown"),
+            studio.list_agents(),
+        )
+        try:
+            result = await llm_task
+        except BaseException:
+            studio_task.cancel()
+            raise
         last_msg = result["messages"][-1]
         research = last_msg.content
 
@@ -97,9 +182,8 @@ def create_researcher():
                 total_tokens=token_usage.get("total_tokens"),
             )
 
-        delegate_enabled = await studio.is_flag_enabled("delegate_to_writer")
+        delegate_enabled, writer_style, agents = await studio_task
         print(f"Delegate to writer enabled: {delegate_enabled}")
-        writer_style = await studio.get_param("writer_style", default="markdown")
 
         if not delegate_enabled:
             return {
@@ -108,7 +192,6 @@ def create_researcher():
                 "note": "Delegation disabled via feature flag 'delegate_to_writer'.",
             }
 
-        agents = await studio.list_agents()
         writer = next(
             (a for a in agents if a.get("agent_id") == "writer"),
             None,
@@ -122,16 +205,15 @@ def create_researcher():
             }
 
         endpoint = writer["endpoint"].rstrip("/")
-        async with httpx.AsyncClient(timeout=60.0) as client:
-            resp = await client.post(
-                f"{endpoint}/invocations",
-                json={
-                    "prompt": prompt,
-                    "research": research,
-                    "style": writer_style,
-                },
-            )
-            writer_result = resp.json()
+        resp = await _HTTP.post(
+            f"{endpoint}/invocations",
+            json={
+                "prompt": prompt,
+                "research": research,
+                "style": writer_style,
+            },
+        )
+        writer_result = resp.json()
 
         return {
             "response": writer_result.get("response", research),
@@ -147,30 +229,9 @@ def create_researcher():
 # Agent B: Writer - uses LLM to polish research into structured response
 # ---------------------------------------------------------------------------
 
-def _build_writer_graph():
-    llm = ChatOpenAI(model="gpt-4o-mini")
-    builder = StateGraph(MessagesState)
-
-    def write(state: MessagesState):
-        system = {
-            "role": "system",
-            "content": (
-                "You are a professional writer. You receive raw research "
-                "findings and transform them into a well-structured, "
-                "clear and engaging response using markdown formatting. "
-                "Include headers, bullet points, and a summary section."
-            ),
-        }
-        return {"messages": [llm.invoke([system] + state["messages"])]}
-
-    builder.add_node("write", write)
-    builder.add_edge(START, "write")
-    return builder.compile()
-
-
 def create_writer():
     app = KiboAgentApp()
-    graph = _build_writer_graph()
+    graph = _get_graph(WRITER_SYSTEM, "write")
 
     studio = StudioClient(
         studio_url=STUDIO_URL,
@@ -239,8 +300,16 @@ def main():
         app, studio = create_writer()
         port = 8082
 
-    loop = asyncio.new_event_loop()
-    loop.run_until_complete(studio.__aenter__())
+    # Tie the Studio client to the server lifespan so it lives on the
+    # same event loop that serves requests.
+    @app.on_startup
+    async def _open_studio():
+        await studio.__aenter__()
+
+    @app.on_shutdown
+    async def _close_studio():
+        await studio.__aexit__(None, None, None)
+
     app.run(host="0.0.0.0", port=port)
 
 
@@ -25,7 +25,7 @@ async def chat_loop():
 
         while True:
             try:
-                user_input = input("You: ")
+                user_input = await asyncio.to_thread(input, "You: ")
             except (EOFError, KeyboardInterrupt):
                 sys.stdout.write("\nBye!\n")
                 break
@@ -37,7 +37,7 @@ async def chat_loop():
             sys.stdout.flush()
 
             async for chunk in client.stream({"prompt": user_input}):
-                token = chunk.get("token")
+                token = chunk.get("tokens") or chunk.get("token")
                 if token:
                     sys.stdout.write(token)
                     sys.stdout.flush()
@@ -1,6 +1,14 @@
 """Example: KiboAgentApp with LangGraph streaming (SSE).
 
-Streams tokens from GPT-4o-mini via Server-Sent Events.
+Streams tokens from GPT-4o-mini via Server-Sent Events. Tokens are
+coalesced into small batches before being sent, so each SSE frame
+carries several tokens instead of one. Tune with:
+
+    KIBO_STREAM_BATCH_TOKENS  max tokens per frame (default: 16)
+    KIBO_STREAM_BATCH_MS      max milliseconds a token waits (default: 20)
+
+Frames are pre-encoded with orjson; KiboAgentApp sends ``bytes`` chunks
+as-is instead of re-serializing them.
 
 Run:
     OPENAI_API_KEY=sk-... uv run python examples/stream_server_example.py
@@ -12,6 +20,10 @@ Test with curl:
         -d '{"prompt": "Tell me a short joke"}'
 """
 
+import asyncio
+import os
+
+import orjson
 from langchain_openai import ChatOpenAI
 from langgraph.graph import START, MessagesState, StateGraph
 
@@ -23,6 +35,9 @@ app = KiboAgentApp(
     }
 )
 
+STREAM_BATCH_TOKENS = int(os.environ.get("KIBO_STREAM_BATCH_TOKENS", "16"))
+STREAM_BATCH_MS = float(os.environ.get("KIBO_STREAM_BATCH_MS", "20"))
+
 llm = ChatOpenAI(model="gpt-4o-mini", streaming=True)
 
 graph_builder = StateGraph(MessagesState)
@@ -43,16 +58,55 @@ async def invoke(payload, context):
     messages = payload.get("messages", [{"role": "user", "content": prompt}])
 
     async def token_stream():
-        async for event in graph.astream_events(
-            {"messages": messages},
-            version="v2",
-        ):
-            kind = event.get("event")
-            if kind == "on_chat_model_stream":
-                content = event["data"]["chunk"].content
-                if content:
-                    yield {"token": content}
-        yield {"done": True}
+        # The producer drains the graph into a bounded queue, so model
+        # generation keeps going while a slow client is being written to.
+        queue: asyncio.Queue = asyncio.Queue(maxsize=64)
+
+        async def produce():
+            try:
+                async for event in graph.astream_events(
+                    {"messages": messages},
+                    version="v2",
+                    include_types=["chat_model"],
+                ):
+                    if event["event"] == "on_chat_model_stream":
+                        content = event["data"]["chunk"].content
+                        if content:
+                            await queue.put(content)
+            except Exception as exc:
+                await queue.put(exc)
+                return
+            await queue.put(None)
+
+        producer = asyncio.create_task(produce())
+        loop = asyncio.get_running_loop()
+        window = STREAM_BATCH_MS / 1000
+        buf = []
+        last_flush = loop.time()
+        try:
+            while True:
+                timeout = max(last_flush + window - loop.time(), 0) if buf else None
+                try:
+                    item = await asyncio.wait_for(queue.get(), timeout)
+                except TimeoutError:
+                    yield orjson.dumps({"tokens": "".join(buf)})
+                    buf.clear()
+                    last_flush = loop.time()
+                    continue
+                if item is None or isinstance(item, Exception):
+                    break
+                buf.append(item)
+                if len(buf) >= STREAM_BATCH_TOKENS or loop.time() - last_flush >= window:
+                    yield orjson.dumps({"tokens": "".join(buf)})
+                    buf.clear()
+                    last_flush = loop.time()
+        finally:
+            producer.cancel()
+        if buf:
+            yield orjson.dumps({"tokens": "".join(buf)})
+        if item is not None:
+            raise item
+        yield orjson.dumps({"done": True})
 
     return token_stream()
 
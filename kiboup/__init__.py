@@ -6,6 +6,9 @@ Supports three connection modes (server + client):
     - KiboAgentMcp / KiboMcpClient: MCP server (pip install kiboup[mcp])
 """
 
+import importlib
+import importlib.util
+
 from kiboup.shared.entities import HealthStatus, LLMUsage, RequestContext
 from kiboup.shared.tls import MTLSConfig
 from kiboup.http.server import KiboAgentApp
@@ -22,13 +25,15 @@ __all__ = [
     "MTLSConfig",
 ]
 
-try:
-    from kiboup.a2a.server import KiboAgentA2A, TaskUpdater
-    from kiboup.a2a.client import KiboA2AClient
-
-    __all__.extend(["KiboAgentA2A", "KiboA2AClient", "TaskUpdater"])
-except ImportError:
-    pass
+# A2A exports are resolved on first access so ``import kiboup`` never
+# loads the a2a-sdk; find_spec only checks that it is installed.
+_A2A_EXPORTS = {
+    "KiboAgentA2A": "kiboup.a2a.server",
+    "KiboA2AClient": "kiboup.a2a.client",
+    "TaskUpdater": "kiboup.a2a.server",
+}
+if importlib.util.find_spec("a2a") is not None:
+    __all__.extend(_A2A_EXPORTS)
 
 try:
     from kiboup.mcp.server import KiboAgentMcp
@@ -52,3 +57,12 @@ try:
     ])
 except ImportError:
     pass
+
+
+def __getattr__(name: str):
+    module_name = _A2A_EXPORTS.get(name)
+    if module_name is None:
+        raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+    value = getattr(importlib.import_module(module_name), name)
+    globals()[name] = value
+    return value
@@ -10,10 +10,21 @@ Submodules:
     - ``kiboup.a2a.utils``   — all A2A utility functions and constants
 """
 
-from kiboup.a2a.server import KiboAgentA2A
-from kiboup.a2a.client import KiboA2AClient
+import importlib
 
-__all__ = [
-    "KiboAgentA2A",
-    "KiboA2AClient",
-]
+# Resolved on first access: the client module imports the a2a-sdk eagerly.
+_EXPORTS = {
+    "KiboAgentA2A": "kiboup.a2a.server",
+    "KiboA2AClient": "kiboup.a2a.client",
+}
+
+__all__ = list(_EXPORTS)
+
+
+def __getattr__(name: str):
+    module_name = _EXPORTS.get(name)
+    if module_name is None:
+        raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+    value = getattr(importlib.import_module(module_name), name)
+    globals()[name] = value
+    return value
@@ -17,6 +17,13 @@ from a2a.client import (
 
 from kiboup.shared.logger import create_logger
 
+try:
+    import h2  # noqa: F401
+
+    _HTTP2 = True
+except ImportError:
+    _HTTP2 = False
+
 # KiboA2AClient is always exported; all SDK symbols come via wildcard above
 __all__ = ["KiboA2AClient"]
 
@@ -57,31 +64,37 @@ class KiboA2AClient:
         self.logger = create_logger("kiboup.a2a_client")
 
     def _build_client_config(self) -> ClientConfig:
-        """Build ClientConfig injecting auth headers via httpx."""
+        """Build ClientConfig injecting auth headers via httpx.
+
+        The pooled httpx client is kept across reconnects and only
+        rebuilt once it has been closed.
+        """
         config = self._client_config or ClientConfig()
 
-        headers: Dict[str, str] = {}
-        if self._api_key:
-            headers["X-API-Key"] = self._api_key
-        if self._bearer_token:
-            headers["Authorization"] = f"Bearer {self._bearer_token}"
+        if self._httpx_client is None or self._httpx_client.is_closed:
+            headers: Dict[str, str] = {}
+            if self._api_key:
+                headers["X-API-Key"] = self._api_key
+            if self._bearer_token:
+                headers["Authorization"] = f"Bearer {self._bearer_token}"
 
-        httpx_kwargs: Dict[str, Any] = {}
-        if headers:
-            httpx_kwargs["headers"] = headers
-        httpx_kwargs["timeout"] = self._timeout
+            httpx_kwargs: Dict[str, Any] = {
+                "headers": headers,
+                "timeout": self._timeout,
+                "limits": httpx.Limits(max_keepalive_connections=32),
+                "http2": _HTTP2,
+            }
 
-        from kiboup.shared.tls import _resolve_mtls
+            from kiboup.shared.tls import _resolve_mtls
 
-        cert_manager = _resolve_mtls(self._mtls)
-        if cert_manager is not None:
-            ssl_kwargs = cert_manager.client_ssl_kwargs()
-            httpx_kwargs.update(ssl_kwargs)
+            cert_manager = _resolve_mtls(self._mtls)
+            if cert_manager is not None:
+                ssl_kwargs = cert_manager.client_ssl_kwargs()
+                httpx_kwargs.update(ssl_kwargs)
 
-        if httpx_kwargs:
             self._httpx_client = httpx.AsyncClient(**httpx_kwargs)
-            config.httpx_client = self._httpx_client
 
+        config.httpx_client = self._httpx_client
         return config
 
     async def __aenter__(self):
@@ -97,18 +110,29 @@ class KiboA2AClient:
         if self._client:
             await self._client.close()
             self._client = None
+        if self._httpx_client is not None and not self._httpx_client.is_closed:
+            await self._httpx_client.aclose()
         self._card = None
 
     async def send(self, text: str) -> Any:
         """Send a text message and return the response."""
-        message = create_text_message_object(content=text)
-        result = None
-        async for event in self._client.send_message(message):
-            result = event
+        result = await self.send_raw(text)
         if hasattr(result, "model_dump"):
             return result.model_dump()
         return result
 
+    async def send_raw(self, text: str) -> Any:
+        """Send a text message and return the final SDK event as-is.
+
+        Same as ``send()`` but skips the ``model_dump()`` conversion, for
+        callers that work with the a2a-sdk models directly.
+        """
+        message = create_text_message_object(content=text)
+        result = None
+        async for result in self._client.send_message(message):
+            pass
+        return result
+
     @property
     def agent_card(self):
         """Access the resolved AgentCard."""
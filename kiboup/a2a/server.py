@@ -34,34 +34,60 @@ Example:
     app.run()
 """
 
-from typing import Any, Dict, List, Optional
-
-# --- Re-export all public symbols from a2a-sdk server subpackages ---
-# This ensures kiboup.a2a.server is never more limited than the SDK itself.
-from a2a.server.agent_execution import *  # noqa: F401, F403
-from a2a.server.apps import *  # noqa: F401, F403
-from a2a.server.request_handlers import *  # noqa: F401, F403
-from a2a.server.tasks import *  # noqa: F401, F403
-from a2a.server.events import *  # noqa: F401, F403
-from a2a.server.context import *  # noqa: F401, F403
-from a2a.types import *  # noqa: F401, F403
-
-# Explicit imports used internally by KiboAgentA2A
-from a2a.server.agent_execution import AgentExecutor
-from a2a.server.apps import A2AStarletteApplication
-from a2a.server.request_handlers import DefaultRequestHandler
-from a2a.server.tasks import InMemoryTaskStore, TaskUpdater
-from a2a.types import AgentCapabilities, AgentCard, AgentSkill, SecurityScheme
+from __future__ import annotations
+
+import asyncio
+import contextlib
+import importlib
+from typing import TYPE_CHECKING, Any, Dict, List, Optional
 
 from kiboup.shared.logger import create_logger
-from kiboup.shared.banner import print_banner, resolve_import_string
 
-# KiboAgentA2A is always exported; all SDK symbols come via wildcard above
+if TYPE_CHECKING:
+    from a2a.types import AgentCapabilities, AgentSkill, SecurityScheme
+
+# --- Lazily re-export all public symbols from a2a-sdk server subpackages ---
+# This ensures kiboup.a2a.server is never more limited than the SDK itself,
+# without importing the whole SDK when the module is merely referenced.
+# Searched last-to-first so name clashes resolve like the wildcard imports
+# they replace (later modules win).
+_SDK_MODULES = (
+    "a2a.server.agent_execution",
+    "a2a.server.apps",
+    "a2a.server.request_handlers",
+    "a2a.server.tasks",
+    "a2a.server.events",
+    "a2a.server.context",
+    "a2a.types",
+)
+
+# KiboAgentA2A is always exported; all SDK symbols are resolved on access
 __all__ = [
     "KiboAgentA2A",
 ]
 
 
+def __getattr__(name: str) -> Any:
+    for module_name in reversed(_SDK_MODULES):
+        module = importlib.import_module(module_name)
+        public = getattr(module, "__all__", None)
+        if public is None:
+            found = not name.startswith("_") and hasattr(module, name)
+        else:
+            found = name in public
+        if found:
+            value = getattr(module, name)
+            globals()[name] = value
+            return value
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+
+
+@contextlib.asynccontextmanager
+async def _eager_tasks(app):
+    """Lifespan that installs the eager task factory on the serving loop."""
+    asyncio.get_running_loop().set_task_factory(asyncio.eager_task_factory)
+    yield
+
 
 class KiboAgentA2A:
     """A2A protocol server wrapper.
@@ -73,7 +99,9 @@ class KiboAgentA2A:
         The ``security`` and ``security_schemes`` parameters are declared
         on the ``AgentCard`` so clients can discover which auth mechanisms
         are required. Server-side enforcement must be done via Starlette
-        middleware (e.g. ``ApiKeyMiddleware``) passed in ``middleware``.
+        middleware (e.g. ``ApiKeyMiddleware``) passed in ``middleware``,
+        or with ``api_keys``; set ``api_key_constant_time=True`` to check
+        those keys in constant time.
 
         Supported schemes (a2a-sdk types):
         - ``HTTPAuthSecurityScheme`` (Bearer tokens)
@@ -81,6 +109,19 @@ class KiboAgentA2A:
         - ``OAuth2SecurityScheme`` (OAuth 2.0 flows)
         - ``OpenIdConnectSecurityScheme`` (OIDC)
         - ``MutualTLSSecurityScheme`` (mTLS - declarative only)
+
+    Performance:
+        ``run()`` uses uvloop and httptools when they are installed
+        (falling back to asyncio/h11) and disables the access log.
+        Any of these can be overridden through ``run(**kwargs)``.
+        The serving loop also uses ``asyncio.eager_task_factory``, so
+        handler coroutines that finish without suspending skip a trip
+        through the scheduler.
+
+        ``backlog``, ``limit_concurrency``, ``limit_max_requests`` and
+        ``timeout_keep_alive`` are forwarded to uvicorn; past
+        ``limit_concurrency`` open connections the server answers 503
+        instead of queueing work.
     """
 
     def __init__(
@@ -97,13 +138,18 @@ class KiboAgentA2A:
         security_schemes: Optional[Dict[str, SecurityScheme]] = None,
         middleware: Optional[List[Any]] = None,
         api_keys: Optional[Dict[str, str]] = None,
+        api_key_constant_time: bool = False,
+        backlog: int = 2048,
+        limit_concurrency: Optional[int] = 1000,
+        limit_max_requests: Optional[int] = None,
+        timeout_keep_alive: int = 5,
     ):
         self._name = name
         self._description = description
         self._version = version
         self._skills = skills or []
         self._url = url
-        self._capabilities = capabilities or AgentCapabilities()
+        self._capabilities = capabilities
         self._default_input_modes = default_input_modes or ["text/plain"]
         self._default_output_modes = default_output_modes or ["text/plain"]
         self._security = security
@@ -112,7 +158,26 @@ class KiboAgentA2A:
         if api_keys:
             from starlette.middleware import Middleware
             from kiboup.shared.middleware import ApiKeyMiddleware
-            self._middleware.insert(0, Middleware(ApiKeyMiddleware, api_keys=api_keys))
+            self._middleware.insert(
+                0,
+                Middleware(
+                    ApiKeyMiddleware,
+                    api_keys=api_keys,
+                    constant_time=api_key_constant_time,
+                ),
+            )
+        self._build_kwargs: Dict[str, Any] = {"lifespan": _eager_tasks}
+        if self._middleware:
+            self._build_kwargs["middleware"] = self._middleware
+        self._agent_card = None
+        self._task_store = None
+        self._import_string: Optional[str] = None
+        self._server_limits: Dict[str, Any] = {
+            "backlog": backlog,
+            "limit_concurrency": limit_concurrency,
+            "limit_max_requests": limit_max_requests,
+            "timeout_keep_alive": timeout_keep_alive,
+        }
         self._executor_cls: Optional[type] = None
         self.logger = create_logger("kiboup.a2a")
 
@@ -125,12 +190,48 @@ class KiboAgentA2A:
                 async def execute(self, context, event_queue): ...
                 async def cancel(self, context, event_queue): ...
         """
+        from a2a.server.agent_execution import AgentExecutor
+
         if not (isinstance(cls, type) and issubclass(cls, AgentExecutor)):
             raise ValueError("@executor requires a subclass of AgentExecutor")
         self._executor_cls = cls
         return cls
 
-    def run(self, host: str = "0.0.0.0", port: int = 8000, reload: bool = False, mtls=False, **kwargs):
+    def _get_agent_card(self, url: str):
+        """Build the AgentCard once; rebuilt only if the served URL changes."""
+        card = self._agent_card
+        if card is not None and card.url == url:
+            return card
+
+        from a2a.types import AgentCapabilities, AgentCard
+
+        card_kwargs: Dict[str, Any] = {
+            "name": self._name,
+            "description": self._description,
+            "url": url,
+            "version": self._version,
+            "skills": self._skills,
+            "capabilities": self._capabilities or AgentCapabilities(),
+            "default_input_modes": self._default_input_modes,
+            "default_output_modes": self._default_output_modes,
+        }
+        if self._security is not None:
+            card_kwargs["security"] = self._security
+        if self._security_schemes is not None:
+            card_kwargs["security_schemes"] = self._security_schemes
+
+        self._agent_card = AgentCard(**card_kwargs)
+        return self._agent_card
+
+    def run(
+        self,
+        host: str = "0.0.0.0",
+        port: int = 8000,
+        reload: bool = False,
+        mtls=False,
+        app_path: Optional[str] = None,
+        **kwargs,
+    ):
         """Start the A2A server with uvicorn.
 
         Args:
@@ -139,8 +240,15 @@ class KiboAgentA2A:
             reload: Enable auto-reload on code changes (default: False).
             mtls: Enable mutual TLS. Pass ``True`` for auto-generated
                 certificates, or an ``MTLSConfig`` for custom paths.
+            app_path: Import string of the module-level app variable
+                (e.g. ``"mymodule:app"``), used with ``workers > 1`` or
+                ``reload=True`` instead of auto-detecting it.
         """
         import uvicorn
+        from a2a.server.apps import A2AStarletteApplication
+        from a2a.server.request_handlers import DefaultRequestHandler
+        from a2a.server.tasks import InMemoryTaskStore
+        from kiboup.shared.banner import print_banner, resolve_import_string, uvicorn_impls
         from kiboup.shared.tls import _resolve_mtls
 
         if self._executor_cls is None:
@@ -158,39 +266,19 @@ class KiboAgentA2A:
         scheme = "https" if cert_manager is not None else "http"
         url = self._url or f"{scheme}://localhost:{port}"
 
-        card_kwargs: Dict[str, Any] = {
-            "name": self._name,
-            "description": self._description,
-            "url": url,
-            "version": self._version,
-            "skills": self._skills,
-            "capabilities": self._capabilities,
-            "default_input_modes": self._default_input_modes,
-            "default_output_modes": self._default_output_modes,
-        }
-        if self._security is not None:
-            card_kwargs["security"] = self._security
-        if self._security_schemes is not None:
-            card_kwargs["security_schemes"] = self._security_schemes
-
-        agent_card = AgentCard(**card_kwargs)
-
-        task_store = InMemoryTaskStore()
+        if self._task_store is None:
+            self._task_store = InMemoryTaskStore()
         request_handler = DefaultRequestHandler(
             agent_executor=self._executor_cls(),
-            task_store=task_store,
+            task_store=self._task_store,
         )
 
         starlette_app = A2AStarletteApplication(
-            agent_card=agent_card,
+            agent_card=self._get_agent_card(url),
             http_handler=request_handler,
         )
 
-        build_kwargs: Dict[str, Any] = {}
-        if self._middleware:
-            build_kwargs["middleware"] = self._middleware
-
-        app = starlette_app.build(**build_kwargs)
+        app = starlette_app.build(**self._build_kwargs)
 
         print_banner("A2A Agent", host, port, mtls_info=mtls_banner)
 
@@ -199,7 +287,9 @@ class KiboAgentA2A:
 
         app_target = app
         if needs_import_string:
-            import_string = resolve_import_string(self)
+            import_string = (
+                app_path or self._import_string or resolve_import_string(self)
+            )
             if import_string is None:
                 raise RuntimeError(
                     "Cannot resolve import string for the app. "
@@ -207,14 +297,30 @@ class KiboAgentA2A:
                     "must be defined at module level. "
                     "Example: uvicorn examples.a2a_server_example:app --workers 2"
                 )
+            self._import_string = import_string
             self._built_app = app
             module_name, var_name = import_string.split(":")
             app_target = f"{module_name}:{var_name}._built_app"
 
-        run_kwargs: Dict[str, Any] = {"host": host, "port": port, "ws": "wsproto"}
+        run_kwargs: Dict[str, Any] = {
+            "host": host,
+            "port": port,
+            "ws": "wsproto",
+            **uvicorn_impls(),
+            "access_log": False,
+            "log_level": "warning",
+            **self._server_limits,
+        }
         if reload:
             run_kwargs["reload"] = True
         if workers > 1:
             run_kwargs["workers"] = workers
         run_kwargs.update(kwargs)
-        uvicorn.run(app_target, **run_kwargs)
+
+        if needs_import_string:
+            uvicorn.run(app_target, **run_kwargs)
+            return
+
+        # Single process: serve the already-built app directly.
+        server = uvicorn.Server(uvicorn.Config(app, **run_kwargs))
+        server.run()
@@ -1,11 +1,44 @@
 """KiboAgentClient - HTTP client for KiboAgentApp servers."""
 
-import json
-from typing import Any, AsyncIterator, Dict, Optional
+import asyncio
+import dataclasses
+import os
+from typing import Any, AsyncIterator, Dict, List, Optional, Tuple
 
 import httpx
 
 from kiboup.shared.logger import create_logger
+from kiboup.shared.serialization import json_dumps, json_loads
+
+try:
+    import h2  # noqa: F401
+
+    _HTTP2 = True
+except ImportError:
+    _HTTP2 = False
+
+# Process-wide pools handed out by KiboAgentClient.shared(), keyed by the
+# event loop that created them plus every setting baked into the transport
+# (see KiboAgentClient._shared_key).
+_shared_clients: Dict[Tuple, httpx.AsyncClient] = {}
+
+
+def _mtls_key(mtls):
+    """Hashable identity of an ``mtls`` argument without touching the disk."""
+    if mtls is None or mtls is False:
+        return None
+    if mtls is True:
+        return ("env", os.environ.get("KIBO_CERTS_DIR"))
+    config = getattr(mtls, "_cfg", mtls)
+    if dataclasses.is_dataclass(config):
+        return dataclasses.astuple(config)
+    return id(mtls)
+
+
+def _prune_shared():
+    """Forget pools whose event loop has been closed; they can't be reused."""
+    for key in [k for k in _shared_clients if k[0].is_closed()]:
+        del _shared_clients[key]
 
 
 class KiboAgentClient:
@@ -28,14 +61,29 @@ class KiboAgentClient:
         ) as client:
             result = await client.invoke({"prompt": "Hello"})
             enabled = await client.studio.is_flag_enabled("my_flag")
+
+    Request bodies are encoded with orjson when it is installed.
+
+    Shared connection pool:
+        client = KiboAgentClient.shared("http://localhost:8080", api_key="sk-abc")
+        async with client:
+            result = await client.invoke({"prompt": "Hello"})
+        ...
+        await KiboAgentClient.close_shared()  # on application shutdown
     """
 
+    _JSON_HEADERS = {"Content-Type": "application/json"}
+
     def __init__(
         self,
         base_url: str = "http://localhost:8080",
         api_key: Optional[str] = None,
         timeout: float = 120.0,
         *,
+        limits: Optional[httpx.Limits] = None,
+        max_connections: int = 100,
+        max_keepalive_connections: int = 20,
+        http2: Optional[bool] = None,
         mtls=False,
         studio=None,
         studio_url: Optional[str] = None,
@@ -44,8 +92,17 @@ class KiboAgentClient:
     ):
         self._base_url = base_url.rstrip("/")
         self._api_key = api_key
+        self._default_headers: Dict[str, str] = (
+            {"X-API-Key": api_key} if api_key else {}
+        )
         self._timeout = timeout
+        self._limits = limits or httpx.Limits(
+            max_keepalive_connections=max_keepalive_connections,
+            max_connections=max_connections,
+        )
+        self._http2 = _HTTP2 if http2 is None else http2
         self._mtls = mtls
+        self._shared = False
         self._client: Optional[httpx.AsyncClient] = None
         self.logger = create_logger("kiboup.agent_client")
 
@@ -61,22 +118,60 @@ class KiboAgentClient:
             )
             self._studio_owned = True
 
+    @classmethod
+    def shared(
+        cls,
+        base_url: str = "http://localhost:8080",
+        api_key: Optional[str] = None,
+        timeout: float = 120.0,
+        **kwargs,
+    ) -> "KiboAgentClient":
+        """Create a client that borrows a process-wide connection pool.
+
+        Clients with the same URL, API key, timeout, pool limits, HTTP/2
+        and mTLS settings on the same event loop reuse one
+        ``httpx.AsyncClient``; leaving the context does not close it.
+        Call ``close_shared()`` on shutdown.
+        """
+        client = cls(base_url, api_key, timeout, **kwargs)
+        client._shared = True
+        return client
+
+    @staticmethod
+    async def close_shared():
+        """Close the pooled clients that ``shared()`` created on this event loop."""
+        loop = asyncio.get_running_loop()
+        _prune_shared()
+        for key in [k for k in _shared_clients if k[0] is loop]:
+            await _shared_clients.pop(key).aclose()
+
     @property
     def studio(self):
         """Access the attached StudioClient (None if not configured)."""
         return self._studio
 
+    def _shared_key(self) -> Tuple:
+        limits = self._limits
+        return (
+            asyncio.get_running_loop(),
+            self._base_url,
+            self._api_key,
+            self._timeout,
+            (limits.max_connections, limits.max_keepalive_connections, limits.keepalive_expiry),
+            self._http2,
+            _mtls_key(self._mtls),
+        )
+
     def _headers(self) -> Dict[str, str]:
-        headers: Dict[str, str] = {}
-        if self._api_key:
-            headers["X-API-Key"] = self._api_key
-        return headers
+        return self._default_headers
 
-    async def __aenter__(self):
+    def _build_client(self) -> httpx.AsyncClient:
         client_kwargs = {
             "base_url": self._base_url,
             "timeout": self._timeout,
             "headers": self._headers(),
+            "limits": self._limits,
+            "http2": self._http2,
         }
         from kiboup.shared.tls import _resolve_mtls
 
@@ -85,7 +180,18 @@ class KiboAgentClient:
             ssl_kwargs = cert_manager.client_ssl_kwargs()
             client_kwargs.update(ssl_kwargs)
 
-        self._client = httpx.AsyncClient(**client_kwargs)
+        return httpx.AsyncClient(**client_kwargs)
+
+    async def __aenter__(self):
+        if self._shared:
+            _prune_shared()
+            key = self._shared_key()
+            client = _shared_clients.get(key)
+            if client is None or client.is_closed:
+                client = _shared_clients[key] = self._build_client()
+            self._client = client
+        else:
+            self._client = self._build_client()
         if self._studio is not None:
             await self._studio.__aenter__()
         return self
@@ -97,29 +203,59 @@ class KiboAgentClient:
             except Exception:
                 pass
         if self._client:
-            await self._client.aclose()
+            if not self._shared:
+                await self._client.aclose()
             self._client = None
 
     async def invoke(self, payload: Dict[str, Any]) -> Dict[str, Any]:
         """Send a request to POST /invocations."""
-        response = await self._client.post("/invocations", json=payload)
+        response = await self._client.post(
+            "/invocations", content=json_dumps(payload), headers=self._JSON_HEADERS
+        )
         response.raise_for_status()
-        return response.json()
+        return json_loads(await response.aread())
+
+    async def invoke_many(
+        self, payloads: List[Dict[str, Any]], concurrency: int = 64
+    ) -> List[Dict[str, Any]]:
+        """Send several payloads to POST /invocations concurrently.
+
+        At most ``concurrency`` requests are in flight at once over the
+        client's pool. Results are returned in the order of ``payloads``.
+        """
+        semaphore = asyncio.Semaphore(concurrency)
+
+        async def _invoke(payload: Dict[str, Any]) -> Dict[str, Any]:
+            async with semaphore:
+                return await self.invoke(payload)
+
+        return await asyncio.gather(*(_invoke(p) for p in payloads))
 
     async def stream(self, payload: Dict[str, Any]) -> AsyncIterator[Any]:
         """Send a request to POST /invocations and stream SSE chunks.
 
-        Yields parsed JSON objects from each SSE data line.
+        Yields parsed JSON objects from each SSE data line. Lines are split
+        on raw bytes so ``event:``/``id:``/keepalive lines are never decoded.
         """
-        async with self._client.stream("POST", "/invocations", json=payload) as response:
+        async with self._client.stream(
+            "POST", "/invocations", content=json_dumps(payload), headers=self._JSON_HEADERS
+        ) as response:
             response.raise_for_status()
-            async for line in response.aiter_lines():
-                if line.startswith("data: "):
-                    data = line[6:]
-                    yield json.loads(data)
+            buffer = bytearray()
+            async for chunk in response.aiter_bytes(65536):
+                buffer += chunk
+                start = 0
+                with memoryview(buffer) as view:
+                    while (end := buffer.find(b"\n", start)) != -1:
+                        if buffer.startswith(b"data: ", start, end):
+                            yield json_loads(view[start + 6:end])
+                        start = end + 1
+                del buffer[:start]
+            if buffer.startswith(b"data: "):
+                yield json_loads(memoryview(buffer)[6:])
 
     async def ping(self) -> Dict[str, Any]:
         """Check server health via GET /ping."""
         response = await self._client.get("/ping")
         response.raise_for_status()
-        return response.json()
+        return json_loads(await response.aread())
@@ -1,18 +1,23 @@
 """KiboAgentApp - HTTP entrypoint server for AI agents."""
 
 import asyncio
+import contextlib
 import contextvars
+import functools
 import inspect
-import json
 import logging
-import threading
 import time
+import typing
 import uuid
+from collections import defaultdict
 from collections.abc import Sequence
+from dataclasses import dataclass
 from datetime import datetime, timezone
-from typing import Any, Callable, Dict, Optional
+from types import AsyncGeneratorType, GeneratorType
+from typing import Any, Callable, Dict, Optional, Set
 
 from starlette.applications import Starlette
+from starlette.concurrency import iterate_in_threadpool
 from starlette.middleware import Middleware
 from starlette.responses import JSONResponse, Response, StreamingResponse
 from starlette.routing import Route, WebSocketRoute
@@ -21,11 +26,49 @@ from starlette.websockets import WebSocket, WebSocketDisconnect
 
 from kiboup.shared.entities import HealthStatus, LLMUsage, RequestContext
 from kiboup.shared.logger import create_logger
-from kiboup.shared.banner import detect_host, print_banner, resolve_import_string
+from kiboup.shared.banner import detect_host, print_banner, resolve_import_string, uvicorn_impls
+from kiboup.shared.serialization import json_dumps, json_loads
+
+try:
+    import msgspec
+except ImportError:
+    msgspec = None
 
 REQUEST_ID_HEADER = "x-request-id"
 SESSION_ID_HEADER = "x-session-id"
 
+_STREAM_DONE = object()
+_STREAM_TYPES = (GeneratorType, AsyncGeneratorType)
+_DECODE_ERRORS = (ValueError,) if msgspec is None else (ValueError, msgspec.DecodeError)
+# Valid JSON that does not match the entrypoint's Struct (a DecodeError
+# subclass, so it is caught first).
+_VALIDATION_ERRORS = () if msgspec is None else (msgspec.ValidationError,)
+
+# Pre-encoded bodies for GET /ping, one per health status.
+_PING_BODIES = {status: json_dumps({"status": status.value}) for status in HealthStatus}
+
+# SSE error frames for exceptions without a message, cached per type.
+_BARE_ERROR_FRAMES: Dict[type, bytes] = {}
+
+
+class _JSONResponse(JSONResponse):
+    """JSONResponse rendered with the shared (orjson-backed) encoder."""
+
+    media_type = "application/json"
+
+    def render(self, content: Any) -> bytes:
+        return json_dumps(content)
+
+
+@dataclass(slots=True)
+class _TaskInfo:
+    """Bookkeeping for a task registered via ``add_task``."""
+
+    name: str
+    start_time: float
+    client_id: Optional[str] = None
+    asyncio_task: Optional[asyncio.Task] = None
+
 
 class KiboAgentApp(Starlette):
     """HTTP server for AI agents with decorator-based routing.
@@ -49,19 +92,30 @@ class KiboAgentApp(Starlette):
         middleware: Sequence[Middleware] | None = None,
         api_keys: Optional[Dict[str, str]] = None,
         studio=None,
+        api_key_constant_time: bool = False,
     ):
         self.handlers: Dict[str, Callable] = {}
         self._ping_handler: Optional[Callable] = None
         self._websocket_handler: Optional[Callable] = None
-        self._active_tasks: Dict[str, Dict[str, Any]] = {}
-        self._task_lock = threading.Lock()
+        self._active_tasks: Dict[str, _TaskInfo] = {}
+        self._tasks_by_client: Dict[Optional[str], Set[str]] = defaultdict(set)
         self._forced_health_status: Optional[HealthStatus] = None
         self._studio = studio
+        self._startup_hooks: list[Callable] = []
+        self._shutdown_hooks: list[Callable] = []
+        self._hooks_installed = False
 
         all_middleware = list(middleware or [])
         if api_keys:
             from kiboup.shared.middleware import ApiKeyMiddleware
-            all_middleware.insert(0, Middleware(ApiKeyMiddleware, api_keys=api_keys))
+            all_middleware.insert(
+                0,
+                Middleware(
+                    ApiKeyMiddleware,
+                    api_keys=api_keys,
+                    constant_time=api_key_constant_time,
+                ),
+            )
 
         routes = [
             Route("/invocations", self._handle_invocation, methods=["POST"]),
@@ -70,7 +124,11 @@ class KiboAgentApp(Starlette):
             Route("/tasks/{task_id}", self._handle_cancel_task, methods=["DELETE"]),
             WebSocketRoute("/ws", self._handle_websocket),
         ]
-        super().__init__(routes=routes, lifespan=lifespan, middleware=all_middleware or None)
+        super().__init__(
+            routes=routes,
+            lifespan=lifespan,
+            middleware=all_middleware or None,
+        )
         self.debug = debug
         self.logger = create_logger("kiboup.agent", debug)
 
@@ -80,9 +138,24 @@ class KiboAgentApp(Starlette):
         """Attach a StudioClient for automatic trace reporting."""
         self._studio = studio
 
-    def entrypoint(self, func: Callable) -> Callable:
-        """Register a function as the main invocation handler (POST /invocations)."""
+    def entrypoint(self, func: Optional[Callable] = None, *, inline: bool = False) -> Callable:
+        """Register a function as the main invocation handler (POST /invocations).
+
+        If the first parameter is annotated with a ``msgspec.Struct``, the
+        request body is decoded and validated straight into that type.
+
+        Sync handlers run in the threadpool by default. Pass
+        ``inline=True`` (``@app.entrypoint(inline=True)``) to call a fast,
+        non-blocking sync handler directly on the event loop instead;
+        anything slow in it will stall every other request.
+        """
+        if func is None:
+            return functools.partial(self.entrypoint, inline=inline)
         self.handlers["main"] = func
+        func._kibo_inline = inline
+        func._kibo_takes_ctx = self._handler_takes_context(func)
+        func._kibo_decoder = self._payload_decoder(func)
+        func._kibo_is_async = asyncio.iscoroutinefunction(func)
         func.run = lambda port=8080, host=None: self.run(port, host)
         return func
 
@@ -96,6 +169,39 @@ class KiboAgentApp(Starlette):
         self._websocket_handler = func
         return func
 
+    def stream(self, batch_ms: float = 5.0) -> Callable:
+        """Coalesce SSE frames of a streaming entrypoint into fewer writes.
+
+        Frames produced within ``batch_ms`` of each other are sent as one
+        chunk. Streams without this decorator write every event as soon
+        as it is produced.
+
+        Example:
+            @app.entrypoint
+            @app.stream(batch_ms=5)
+            async def invoke(payload, context):
+                async for token in llm.astream(payload["prompt"]):
+                    yield {"token": token.content}
+        """
+
+        def decorator(func: Callable) -> Callable:
+            func._kibo_stream_batch_ms = batch_ms
+            return func
+
+        return decorator
+
+    def on_startup(self, func: Callable) -> Callable:
+        """Register a function to run when the server starts (sync or async)."""
+        self._install_hooks()
+        self._startup_hooks.append(func)
+        return func
+
+    def on_shutdown(self, func: Callable) -> Callable:
+        """Register a function to run when the server stops (sync or async)."""
+        self._install_hooks()
+        self._shutdown_hooks.append(func)
+        return func
+
     def async_task(self, func: Callable) -> Callable:
         """Track async tasks for health status (BUSY while running).
 
@@ -108,11 +214,9 @@ class KiboAgentApp(Starlette):
 
         async def wrapper(*args, context: RequestContext = None, **kwargs):
             client_id = context.client_id if context else None
-            task_id = self.add_task(func.__name__, client_id=client_id)
-            asyncio_task = asyncio.current_task()
-            with self._task_lock:
-                if task_id in self._active_tasks:
-                    self._active_tasks[task_id]["asyncio_task"] = asyncio_task
+            task_id = self._register_task(
+                func.__name__, client_id, asyncio.current_task()
+            )
             try:
                 result = await func(*args, context=context, task_id=task_id, **kwargs)
                 return result
@@ -166,20 +270,22 @@ class KiboAgentApp(Starlette):
         Returns:
             Unique task ID string.
         """
-        with self._task_lock:
-            task_id = str(uuid.uuid4())
-            self._active_tasks[task_id] = {
-                "name": name,
-                "start_time": time.time(),
-                "client_id": client_id,
-                "asyncio_task": None,
-            }
-            return task_id
+        return self._register_task(name, client_id)
+
+    def _register_task(
+        self,
+        name: str,
+        client_id: Optional[str] = None,
+        asyncio_task: Optional[asyncio.Task] = None,
+    ) -> str:
+        task_id = uuid.uuid4().hex
+        self._active_tasks[task_id] = _TaskInfo(name, time.time(), client_id, asyncio_task)
+        self._tasks_by_client[client_id].add(task_id)
+        return task_id
 
     def complete_task(self, task_id: str) -> bool:
         """Mark a task as complete. Returns True if found."""
-        with self._task_lock:
-            return self._active_tasks.pop(task_id, None) is not None
+        return self._pop_task(task_id) is not None
 
     def cancel_task(self, task_id: str, client_id: Optional[str] = None) -> bool:
         """Cancel a running task.
@@ -196,18 +302,19 @@ class KiboAgentApp(Starlette):
             PermissionError: If ``client_id`` does not match the task owner.
             KeyError: If the task does not exist.
         """
-        with self._task_lock:
-            task_info = self._active_tasks.get(task_id)
-            if task_info is None:
-                raise KeyError(task_id)
+        task_info = self._active_tasks.get(task_id)
+        if task_info is None:
+            raise KeyError(task_id)
 
-            owner = task_info.get("client_id")
-            if owner is not None and owner != client_id:
-                raise PermissionError(task_id)
+        owner = task_info.client_id
+        if owner is not None and owner != client_id:
+            raise PermissionError(task_id)
 
-            asyncio_task = task_info.get("asyncio_task")
-            self._active_tasks.pop(task_id, None)
+        # Claim the task; a concurrent complete/cancel may have won the race.
+        if self._pop_task(task_id) is None:
+            raise KeyError(task_id)
 
+        asyncio_task = task_info.asyncio_task
         if asyncio_task is not None and not asyncio_task.done():
             asyncio_task.cancel()
 
@@ -215,8 +322,17 @@ class KiboAgentApp(Starlette):
 
     def is_task_cancelled(self, task_id: str) -> bool:
         """Check if a task has been cancelled (no longer tracked)."""
-        with self._task_lock:
-            return task_id not in self._active_tasks
+        return task_id not in self._active_tasks
+
+    def _pop_task(self, task_id: str) -> Optional[_TaskInfo]:
+        task_info = self._active_tasks.pop(task_id, None)
+        if task_info is not None:
+            owned = self._tasks_by_client.get(task_info.client_id)
+            if owned is not None:
+                owned.discard(task_id)
+                if not owned:
+                    del self._tasks_by_client[task_info.client_id]
+        return task_info
 
     # -- Server --
 
@@ -229,6 +345,9 @@ class KiboAgentApp(Starlette):
             reload: Enable auto-reload on code changes (default: False).
             mtls: Enable mutual TLS. Pass ``True`` for auto-generated
                 certificates, or an ``MTLSConfig`` for custom paths.
+
+        uvloop and httptools are used when installed; extra keyword
+        arguments go to uvicorn, e.g. ``app.run(loop="asyncio", http="h11")``.
         """
         import uvicorn
         from kiboup.shared.tls import _resolve_mtls
@@ -264,6 +383,7 @@ class KiboAgentApp(Starlette):
             "host": host,
             "port": port,
             "ws": "wsproto",
+            **uvicorn_impls(),
             "access_log": self.debug,
             "log_level": "info" if self.debug else "warning",
         }
@@ -276,6 +396,36 @@ class KiboAgentApp(Starlette):
 
     # -- Internal --
 
+    def _install_hooks(self):
+        """Wrap the router's lifespan once the first hook is registered.
+
+        Until then Starlette keeps its own lifespan, so the user's one (or
+        the default that runs ``add_event_handler`` callbacks) is untouched.
+        """
+        if not self._hooks_installed:
+            self._hooks_installed = True
+            self.router.lifespan_context = self._wrap_lifespan(self.router.lifespan_context)
+
+    def _wrap_lifespan(self, lifespan: Lifespan) -> Lifespan:
+        """Run startup/shutdown hooks inside the router's existing lifespan."""
+
+        @contextlib.asynccontextmanager
+        async def _lifespan(app):
+            async with lifespan(app) as state:
+                for hook in self._startup_hooks:
+                    result = hook()
+                    if inspect.isawaitable(result):
+                        await result
+                try:
+                    yield state
+                finally:
+                    for hook in reversed(self._shutdown_hooks):
+                        result = hook()
+                        if inspect.isawaitable(result):
+                            await result
+
+        return _lifespan
+
     def _log(
         self,
         level: int,
@@ -285,26 +435,22 @@ class KiboAgentApp(Starlette):
         **kwargs,
     ):
         """Log with request context fields and optional LLM usage data."""
-        extra = {}
-        if context:
-            extra["request_id"] = context.request_id
-            if context.session_id:
-                extra["session_id"] = context.session_id
-            if context.client_id:
-                extra["client_id"] = context.client_id
+        extra = context.to_log_extra() if context else {}
         if llm_usage is not None:
-            extra["llm_usage"] = llm_usage
+            extra = {**extra, "llm_usage": llm_usage}
             context._llm_usage = llm_usage
         self.logger.log(level, message, extra=extra, **kwargs)
 
     def _build_context(self, request) -> RequestContext:
-        headers = dict(request.headers)
-        client_id = getattr(request.state, "client_id", None) if hasattr(request, "state") else None
+        headers = request.headers
+        # request.state is a view over scope["state"], where ApiKeyMiddleware
+        # stores client_id; read the dict directly.
+        state = request.scope.get("state")
+        client_id = state.get("client_id") if state else None
         return RequestContext(
-            request_id=headers.get(REQUEST_ID_HEADER, str(uuid.uuid4())),
+            request_id=headers.get(REQUEST_ID_HEADER) or uuid.uuid4().hex,
             session_id=headers.get(SESSION_ID_HEADER),
             client_id=client_id,
-            headers=headers,
             request=request,
         )
 
@@ -315,16 +461,37 @@ class KiboAgentApp(Starlette):
         except Exception:
             return False
 
+    def _payload_decoder(self, handler: Callable):
+        """Build a msgspec decoder when the payload parameter is a Struct."""
+        if msgspec is None:
+            return None
+        try:
+            params = list(inspect.signature(handler).parameters.keys())
+            hint = typing.get_type_hints(handler).get(params[0]) if params else None
+        except Exception:
+            return None
+        if isinstance(hint, type) and issubclass(hint, msgspec.Struct):
+            return msgspec.json.Decoder(hint)
+        return None
+
     async def _invoke_handler(self, handler, payload, context):
-        takes_ctx = self._handler_takes_context(handler)
+        takes_ctx = getattr(handler, "_kibo_takes_ctx", None)
+        if takes_ctx is None:
+            takes_ctx = self._handler_takes_context(handler)
         args = (payload, context) if takes_ctx else (payload,)
 
-        if asyncio.iscoroutinefunction(handler):
+        is_async = getattr(handler, "_kibo_is_async", None)
+        if is_async is None:
+            is_async = asyncio.iscoroutinefunction(handler)
+        if is_async:
             return await handler(*args)
+        if getattr(handler, "_kibo_inline", False):
+            return handler(*args)
 
-        loop = asyncio.get_event_loop()
         ctx = contextvars.copy_context()
-        return await loop.run_in_executor(None, ctx.run, handler, *args)
+        return await asyncio.get_running_loop().run_in_executor(
+            None, ctx.run, handler, *args
+        )
 
     @staticmethod
     def _utc_now() -> str:
@@ -395,23 +562,32 @@ class KiboAgentApp(Starlette):
         start = time.time()
 
         try:
-            payload = await request.json()
-
             handler = self.handlers.get("main")
             if not handler:
-                return JSONResponse({"error": "No entrypoint defined"}, status_code=500)
+                return _JSONResponse({"error": "No entrypoint defined"}, status_code=500)
+
+            body = await request.body()
+            decoder = getattr(handler, "_kibo_decoder", None)
+            try:
+                payload = decoder.decode(body) if decoder is not None else json_loads(body)
+            except _VALIDATION_ERRORS as exc:
+                return _JSONResponse(
+                    {"error": "Invalid payload", "details": str(exc)}, status_code=400
+                )
+            except _DECODE_ERRORS as exc:
+                return _JSONResponse(
+                    {"error": "Invalid JSON", "details": str(exc)}, status_code=400
+                )
 
             result = await self._invoke_handler(handler, payload, context)
             duration = time.time() - start
 
-            if inspect.isgenerator(result):
-                return StreamingResponse(
-                    self._wrap_sync_stream(result), media_type="text/event-stream"
-                )
-            if inspect.isasyncgen(result):
-                return StreamingResponse(
-                    self._wrap_async_stream(result), media_type="text/event-stream"
-                )
+            if isinstance(result, _STREAM_TYPES):
+                frames = self._wrap_stream(result)
+                batch_ms = getattr(handler, "_kibo_stream_batch_ms", None)
+                if batch_ms:
+                    frames = self._batch_stream(frames, batch_ms)
+                return StreamingResponse(frames, media_type="text/event-stream")
 
             llm_usage = getattr(context, "_llm_usage", None)
             self._log(
@@ -425,36 +601,40 @@ class KiboAgentApp(Starlette):
 
             return Response(self._serialize(result), media_type="application/json")
 
-        except json.JSONDecodeError as exc:
-            return JSONResponse(
-                {"error": "Invalid JSON", "details": str(exc)}, status_code=400
-            )
         except Exception as exc:
             duration = time.time() - start
             self._log(logging.ERROR, "Invocation failed (%.3fs)" % duration, context, exc_info=True)
             await self._send_trace(context, {}, None, duration, status="error", error=str(exc))
-            return JSONResponse({"error": str(exc)}, status_code=500)
+            return _JSONResponse({"error": str(exc)}, status_code=500)
 
     def _handle_ping(self, request):
         try:
             status = self.get_health_status()
-            return JSONResponse({"status": status.value})
+            body = _PING_BODIES.get(status)
+            if body is None:
+                return _JSONResponse({"status": status.value})
         except Exception:
-            return JSONResponse({"status": HealthStatus.HEALTHY.value})
+            body = _PING_BODIES[HealthStatus.HEALTHY]
+        return Response(body, media_type="application/json")
 
     def _handle_list_tasks(self, request):
         """GET /tasks - List active tasks (filtered by caller's client_id)."""
         context = self._build_context(request)
-        with self._task_lock:
-            tasks = []
-            for tid, info in self._active_tasks.items():
-                if context.client_id is None or info.get("client_id") == context.client_id:
-                    tasks.append({
-                        "task_id": tid,
-                        "name": info["name"],
-                        "running_seconds": round(time.time() - info["start_time"], 1),
-                    })
-        return JSONResponse({"tasks": tasks})
+        tasks = []
+        if context.client_id is None:
+            entries = list(self._active_tasks.items())
+        else:
+            owned = list(self._tasks_by_client.get(context.client_id, ()))
+            entries = [(tid, self._active_tasks.get(tid)) for tid in owned]
+        now = time.time()
+        for tid, info in entries:
+            if info is not None:
+                tasks.append({
+                    "task_id": tid,
+                    "name": info.name,
+                    "running_seconds": round(now - info.start_time, 1),
+                })
+        return _JSONResponse({"tasks": tasks})
 
     async def _handle_cancel_task(self, request):
         """DELETE /tasks/{task_id} - Cancel a task (owner only)."""
@@ -464,18 +644,18 @@ class KiboAgentApp(Starlette):
         try:
             self.cancel_task(task_id, client_id=context.client_id)
         except KeyError:
-            return JSONResponse(
+            return _JSONResponse(
                 {"error": "Task not found", "task_id": task_id},
                 status_code=404,
             )
         except PermissionError:
-            return JSONResponse(
+            return _JSONResponse(
                 {"error": "Only the task owner can cancel this task"},
                 status_code=403,
             )
 
         self._log(logging.INFO, "Task cancelled via API: %s" % task_id, context)
-        return JSONResponse({"status": "cancelled", "task_id": task_id})
+        return _JSONResponse({"status": "cancelled", "task_id": task_id})
 
     async def _handle_websocket(self, websocket: WebSocket):
         context = self._build_context(websocket)
@@ -493,31 +673,112 @@ class KiboAgentApp(Starlette):
             except Exception:
                 pass
 
-    def _serialize(self, obj) -> str:
+    def _serialize(self, obj) -> bytes:
         try:
-            return json.dumps(obj, ensure_ascii=False)
+            return json_dumps(obj)
         except (TypeError, ValueError):
             try:
-                return json.dumps(str(obj), ensure_ascii=False)
+                return json_dumps(str(obj))
             except Exception:
-                return json.dumps(
+                return json_dumps(
                     {"error": "Serialization failed", "type": type(obj).__name__}
                 )
 
     def _to_sse(self, obj) -> bytes:
-        data = self._serialize(obj)
-        return f"data: {data}\n\n".encode("utf-8")
+        """Frame a value as an SSE event.
 
-    async def _wrap_async_stream(self, generator):
+        Bytes ending in a blank line are taken as a complete frame and sent
+        as-is; other bytes must be a single line and are wrapped in ``data:``.
+        """
+        if not isinstance(obj, (bytes, bytearray)):
+            return b"data: " + self._serialize(obj) + b"\n\n"
+        if obj.endswith(b"\n\n"):
+            return bytes(obj)
+        if b"\n" in obj or b"\r" in obj:
+            raise ValueError("Raw SSE payload must be one line or a complete frame")
+        return b"data: " + obj + b"\n\n"
+
+    async def _wrap_stream(self, generator):
+        """Frame values from a sync or async generator as SSE events.
+
+        Sync generators are stepped in the threadpool so blocking
+        producers never stall the event loop.
+        """
+        if not isinstance(generator, AsyncGeneratorType):
+            generator = iterate_in_threadpool(generator)
         try:
             async for value in generator:
                 yield self._to_sse(value)
         except Exception as exc:
-            yield self._to_sse({"error": str(exc), "error_type": type(exc).__name__})
+            yield self._error_frame(exc)
+        finally:
+            aclose = getattr(generator, "aclose", None)
+            if aclose is not None:
+                await aclose()
+
+    def _error_frame(self, exc: Exception) -> bytes:
+        message = str(exc)
+        if message:
+            return self._to_sse({"error": message, "error_type": type(exc).__name__})
+        exc_type = type(exc)
+        frame = _BARE_ERROR_FRAMES.get(exc_type)
+        if frame is None:
+            frame = self._to_sse({"error": "", "error_type": exc_type.__name__})
+            _BARE_ERROR_FRAMES[exc_type] = frame
+        return frame
+
+    async def _batch_stream(self, frames, batch_ms: float):
+        """Join frames that arrive within ``batch_ms`` into a single chunk.
+
+        A bounded queue between the producer task and the writer applies
+        backpressure when the client reads slower than frames are made.
+        """
+        queue: asyncio.Queue = asyncio.Queue(maxsize=64)
+        failure = None
+        closing = False
 
-    def _wrap_sync_stream(self, generator):
+        async def produce():
+            nonlocal failure
+            try:
+                async for frame in frames:
+                    await queue.put(frame)
+            except BaseException as exc:
+                failure = exc
+                raise
+            finally:
+                await frames.aclose()
+                if not closing:
+                    await queue.put(_STREAM_DONE)
+
+        loop = asyncio.get_running_loop()
+        window = batch_ms / 1000
+        producer = asyncio.create_task(produce())
         try:
-            for value in generator:
-                yield self._to_sse(value)
-        except Exception as exc:
-            yield self._to_sse({"error": str(exc), "error_type": type(exc).__name__})
+            frame = await queue.get()
+            while frame is not _STREAM_DONE:
+                buffer = bytearray(frame)
+                deadline = loop.time() + window
+                while True:
+                    remaining = deadline - loop.time()
+                    if remaining <= 0:
+                        frame = None
+                        break
+                    try:
+                        frame = await asyncio.wait_for(queue.get(), remaining)
+                    except TimeoutError:
+                        frame = None
+                        break
+                    if frame is _STREAM_DONE:
+                        break
+                    buffer += frame
+                yield bytes(buffer)
+                if frame is None:
+                    frame = await queue.get()
+            if failure is not None:
+                raise failure
+        finally:
+            # Client went away or the stream ended: stop the producer and
+            # wait for it so the handler's generator is closed right here.
+            closing = True
+            producer.cancel()
+            await asyncio.gather(producer, return_exceptions=True)
@@ -69,6 +69,7 @@ class KiboAgentMcp:
         name: str,
         auth: Optional[Any] = None,
         api_keys: Optional[dict] = None,
+        api_key_constant_time: bool = False,
         **kwargs,
     ):
         init_kwargs: dict = dict(kwargs)
@@ -76,6 +77,7 @@ class KiboAgentMcp:
             init_kwargs["auth"] = auth
         self._mcp = FastMCP(name, **init_kwargs)
         self._api_keys = api_keys
+        self._api_key_constant_time = api_key_constant_time
         self.logger = create_logger("kiboup.mcp")
 
     def tool(self, *args, **kwargs):
@@ -130,7 +132,11 @@ class KiboAgentMcp:
             from kiboup.shared.middleware import ApiKeyMiddleware
             from starlette.middleware import Middleware
             extra_kwargs["middleware"] = [
-                Middleware(ApiKeyMiddleware, api_keys=self._api_keys),
+                Middleware(
+                    ApiKeyMiddleware,
+                    api_keys=self._api_keys,
+                    constant_time=self._api_key_constant_time,
+                ),
             ]
         if reload:
             extra_kwargs["reload"] = True
@@ -2,7 +2,7 @@
 
 from kiboup.shared.entities import HealthStatus, LLMUsage, RequestContext
 from kiboup.shared.logger import create_logger
-from kiboup.shared.banner import detect_host, print_banner, resolve_import_string
+from kiboup.shared.banner import detect_host, print_banner, resolve_import_string, uvicorn_impls
 from kiboup.shared.middleware import ApiKeyMiddleware
 from kiboup.shared.tls import MTLSConfig, CertManager
 
@@ -14,6 +14,7 @@ __all__ = [
     "detect_host",
     "print_banner",
     "resolve_import_string",
+    "uvicorn_impls",
     "ApiKeyMiddleware",
     "MTLSConfig",
     "CertManager",
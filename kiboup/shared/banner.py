@@ -1,10 +1,12 @@
-"""Startup banner and host/import utilities for kiboup."""
+"""Startup banner and host/import/uvicorn utilities for kiboup."""
 
+import functools
 import os
 import sys
-from typing import Any, List, Optional
+from typing import Any, Dict, List, Optional
 
 
+@functools.cache
 def detect_host() -> str:
     """Detect host: 0.0.0.0 for Docker, 127.0.0.1 otherwise."""
     if os.path.exists("/.dockerenv") or os.environ.get("DOCKER_CONTAINER"):
@@ -12,6 +14,27 @@ def detect_host() -> str:
     return "127.0.0.1"
 
 
+def uvicorn_impls() -> Dict[str, str]:
+    """Pick uvicorn's C-backed loop/parser when installed, else pure Python."""
+    try:
+        import uvloop  # noqa: F401
+        loop = "uvloop"
+    except ImportError:
+        loop = "asyncio"
+    try:
+        import httptools  # noqa: F401
+        http = "httptools"
+    except ImportError:
+        http = "h11"
+    return {"loop": loop, "http": http}
+
+
+# Conventional module-level names for an ASGI app, probed before a full scan.
+_COMMON_APP_NAMES = ("app", "application", "main", "api")
+
+_SEP_TABLE = str.maketrans(os.sep, ".")
+
+
 def resolve_import_string(app_instance: Any) -> Optional[str]:
     """Resolve the import string for an app instance (e.g. 'examples.my_app:app').
 
@@ -24,11 +47,16 @@ def resolve_import_string(app_instance: Any) -> Optional[str]:
     if not main or not getattr(main, "__file__", None):
         return None
 
-    var_name = None
-    for name, obj in vars(main).items():
-        if obj is app_instance and not name.startswith("_"):
-            var_name = name
-            break
+    namespace = main.__dict__
+    var_name = next(
+        (name for name in _COMMON_APP_NAMES if namespace.get(name) is app_instance),
+        None,
+    )
+    if var_name is None:
+        for name, obj in namespace.items():
+            if obj is app_instance and not name.startswith("_"):
+                var_name = name
+                break
     if not var_name:
         return None
 
@@ -38,7 +66,9 @@ def resolve_import_string(app_instance: Any) -> Optional[str]:
         return None
 
     rel = os.path.relpath(file_path, cwd)
-    module = rel.replace(os.sep, ".").removesuffix(".py")
+    if rel.endswith(".py"):
+        rel = rel[:-3]
+    module = rel.translate(_SEP_TABLE)
     return f"{module}:{var_name}"
 
 
@@ -86,6 +116,15 @@ def _center_line(content: str, width: int) -> str:
     return " " * left + content + " " * right
 
 
+# Art lines never change, so center (and color) them once at import.
+_BANNER_PLAIN = tuple(_center_line(line, _BANNER_WIDTH - 4) for line in _BANNER_ART)
+_BANNER_TTY = tuple(
+    _rgb(*_GRADIENT_RGB[i % len(_GRADIENT_RGB)], line)
+    for i, line in enumerate(_BANNER_PLAIN)
+)
+
+
+@functools.cache
 def _terminal_width() -> int:
     """Detect terminal width with fallback to 80."""
     try:
@@ -108,19 +147,15 @@ def print_banner(mode: str, host: str, port: int, mtls_info: str = ""):
     pipe_r = _border(" |", is_tty)
     empty = _border("|", is_tty) + " " * (w - 2) + _border("|", is_tty)
 
-    out = sys.stderr.write
+    parts: List[str] = []
+    out = parts.append
 
     out("\n")
     out(margin + top + "\n")
     out(margin + empty + "\n")
 
-    for i, line in enumerate(_BANNER_ART):
-        padded = _center_line(line, inner)
-        color = _GRADIENT_RGB[i % len(_GRADIENT_RGB)]
-        if is_tty:
-            out(margin + pipe_l + _rgb(*color, padded) + pipe_r + "\n")
-        else:
-            out(margin + pipe_l + padded + pipe_r + "\n")
+    for line in _BANNER_TTY if is_tty else _BANNER_PLAIN:
+        out(margin + pipe_l + line + pipe_r + "\n")
 
     out(margin + empty + "\n")
 
@@ -151,3 +186,5 @@ def print_banner(mode: str, host: str, port: int, mtls_info: str = ""):
     out(margin + empty + "\n")
     out(margin + bot + "\n")
     out("\n")
+
+    sys.stderr.write("".join(parts))
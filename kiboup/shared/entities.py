@@ -1,8 +1,9 @@
 """Core domain entities for kiboup."""
 
-from dataclasses import asdict, dataclass, field
+import operator
+from dataclasses import dataclass, field
 from enum import Enum
-from typing import Any, Dict, Optional
+from typing import Any, Dict, Mapping, Optional
 
 
 class HealthStatus(str, Enum):
@@ -12,7 +13,15 @@ class HealthStatus(str, Enum):
     BUSY = "Busy"
 
 
-@dataclass
+_AI_MESSAGE_METADATA = operator.attrgetter("usage_metadata", "response_metadata")
+
+_LLM_USAGE_FIELDS = (
+    "model", "provider", "input_tokens", "output_tokens", "total_tokens",
+    "latency_ms", "extra",
+)
+
+
+@dataclass(slots=True)
 class LLMUsage:
     """Optional LLM response metadata for structured logging.
 
@@ -39,19 +48,113 @@ class LLMUsage:
     latency_ms: Optional[float] = None
     extra: Optional[Dict[str, Any]] = None
 
+    @classmethod
+    def from_ai_message(cls, message: Any, provider: Optional[str] = None) -> "LLMUsage":
+        """Build usage from a LangChain ``AIMessage`` (or any object exposing
+        ``usage_metadata`` / ``response_metadata``).
+
+        Example:
+            result = await graph.ainvoke({"messages": messages})
+            usage = LLMUsage.from_ai_message(result["messages"][-1], provider="openai")
+        """
+        try:
+            usage_meta, resp_meta = _AI_MESSAGE_METADATA(message)
+        except AttributeError:
+            usage_meta = getattr(message, "usage_metadata", None)
+            resp_meta = getattr(message, "response_metadata", None)
+        usage_meta = usage_meta or {}
+        resp_meta = resp_meta or {}
+        return cls(
+            resp_meta.get("model_name"),
+            provider,
+            usage_meta.get("input_tokens"),
+            usage_meta.get("output_tokens"),
+            usage_meta.get("total_tokens"),
+        )
+
     def to_dict(self) -> Dict[str, Any]:
-        """Return non-None fields as a dict."""
-        raw = asdict(self)
-        return {k: v for k, v in raw.items() if v is not None}
+        """Return non-None fields as a dict (``extra`` is not copied)."""
+        out = {}
+        for name in _LLM_USAGE_FIELDS:
+            value = getattr(self, name)
+            if value is not None:
+                out[name] = value
+        return out
 
 
-@dataclass
+@dataclass(init=False)
 class RequestContext:
-    """Request context passed to handler functions."""
+    """Request context passed to handler functions.
+
+    ``headers`` is a plain dict. When it is not passed, it is copied from
+    ``request.headers`` on first access and cached, so requests whose
+    handler never reads it skip the copy.
+    """
 
     request_id: str = ""
     session_id: Optional[str] = None
     client_id: Optional[str] = None
-    headers: Dict[str, str] = field(default_factory=dict)
     request: Any = None
     _llm_usage: Optional[Any] = field(default=None, repr=False)
+    _raw_headers: Optional[Mapping[str, str]] = field(default=None, repr=False, compare=False)
+    _headers: Optional[Dict[str, str]] = field(default=None, repr=False)
+
+    def __init__(
+        self,
+        request_id: str = "",
+        session_id: Optional[str] = None,
+        client_id: Optional[str] = None,
+        headers: Optional[Dict[str, str]] = None,
+        request: Any = None,
+        _llm_usage: Optional[Any] = None,
+    ):
+        self.request_id = request_id
+        self.session_id = session_id
+        self.client_id = client_id
+        self.request = request
+        self._llm_usage = _llm_usage
+        self._raw_headers = getattr(request, "headers", None)
+        self._headers = headers
+
+    @property
+    def headers(self) -> Dict[str, str]:
+        headers = self._headers
+        if headers is None:
+            raw = self._raw_headers
+            headers = self._headers = dict(raw) if raw is not None else {}
+        return headers
+
+    @headers.setter
+    def headers(self, value: Dict[str, str]) -> None:
+        self._headers = value
+
+    def to_log_extra(self) -> Dict[str, Any]:
+        """Context fields for structured log records.
+
+        Built on every call so later changes to the ids are picked up.
+        """
+        extra = {"request_id": self.request_id}
+        if self.session_id:
+            extra["session_id"] = self.session_id
+        if self.client_id:
+            extra["client_id"] = self.client_id
+        return extra
+
+    def get_header(self, name: str, default: Optional[str] = None) -> Optional[str]:
+        """Return a request header by case-insensitive name.
+
+        Reads the request's header mapping directly until ``headers`` has
+        been materialised, so a single lookup does not copy every header.
+        """
+        headers = self._headers if self._headers is not None else self._raw_headers
+        if headers is None:
+            return default
+        value = headers.get(name)
+        if value is None:
+            lowered = name.lower()
+            value = headers.get(lowered)
+            if value is None:
+                for key, item in headers.items():
+                    if key.lower() == lowered:
+                        return item
+        return default if value is None else value
@@ -1,30 +1,54 @@
 """Structured JSON logging for kiboup."""
 
-import json
 import logging
+import time
 import traceback as tb_module
-from datetime import datetime, timezone
+from enum import Enum
 
 from kiboup.shared.entities import LLMUsage
+from kiboup.shared.serialization import json_dumps
+
+_CONTEXT_FIELDS = ("request_id", "session_id", "client_id")
+
+
+def _json_default(obj):
+    """Fallback encoder for values the JSON encoder cannot handle natively."""
+    if isinstance(obj, LLMUsage):
+        return obj.to_dict()
+    if isinstance(obj, Enum):
+        return obj.value
+    return str(obj)
 
 
 class _JsonFormatter(logging.Formatter):
     """Structured JSON log formatter."""
 
+    def __init__(self):
+        super().__init__()
+        # (epoch second, formatted "YYYY-mm-ddTHH:MM:SS") of the last record.
+        self._ts_cache = (None, "")
+
+    def _timestamp(self, created: float) -> str:
+        second = int(created)
+        cached_second, prefix = self._ts_cache
+        if second != cached_second:
+            prefix = time.strftime("%Y-%m-%dT%H:%M:%S", time.gmtime(second))
+            self._ts_cache = (second, prefix)
+        return "%s.%03dZ" % (prefix, int((created - second) * 1000))
+
     def format(self, record):
         entry = {
-            "timestamp": datetime.now(timezone.utc).strftime("%Y-%m-%dT%H:%M:%S.%f")[:-3] + "Z",
+            "timestamp": self._timestamp(record.created),
             "level": record.levelname,
             "message": record.getMessage(),
             "logger": record.name,
         }
-        if getattr(record, "request_id", None):
-            entry["request_id"] = record.request_id
-        if getattr(record, "session_id", None):
-            entry["session_id"] = record.session_id
-        if getattr(record, "client_id", None):
-            entry["client_id"] = record.client_id
-        llm_usage = getattr(record, "llm_usage", None)
+        fields = record.__dict__
+        for key in _CONTEXT_FIELDS:
+            value = fields.get(key)
+            if value:
+                entry[key] = value
+        llm_usage = fields.get("llm_usage")
         if llm_usage is not None:
             if isinstance(llm_usage, LLMUsage):
                 entry["llm_usage"] = llm_usage.to_dict()
@@ -34,7 +58,7 @@ class _JsonFormatter(logging.Formatter):
             entry["error_type"] = record.exc_info[0].__name__
             entry["error_message"] = str(record.exc_info[1])
             entry["stack_trace"] = tb_module.format_exception(*record.exc_info)
-        return json.dumps(entry, ensure_ascii=False)
+        return json_dumps(entry, default=_json_default).decode("utf-8")
 
 
 def create_logger(name: str, debug: bool = False) -> logging.Logger:
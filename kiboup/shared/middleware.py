@@ -4,17 +4,32 @@ Also re-exports starlette.middleware.Middleware for convenience:
     from kiboup.shared.middleware import Middleware, ApiKeyMiddleware
 """
 
-import json
+import hmac
 import logging
 
 from starlette.middleware import Middleware
 from starlette.types import ASGIApp, Receive, Scope, Send
 
 from kiboup.shared.logger import create_logger
+from kiboup.shared.serialization import json_dumps
 
 API_KEY_HEADER = "x-api-key"
 
 
+def _error_response(status: int, payload: dict):
+    """Pre-encode a JSON error as (status, headers, body) for raw ASGI sends."""
+    body = json_dumps(payload)
+    headers = (
+        (b"content-type", b"application/json"),
+        (b"content-length", str(len(body)).encode()),
+    )
+    return status, headers, body
+
+
+_MISSING_KEY = _error_response(401, {"error": "Missing API key", "header": API_KEY_HEADER})
+_INVALID_KEY = _error_response(403, {"error": "Invalid API key"})
+
+
 class ApiKeyMiddleware:
     """API Key authentication middleware (pure ASGI).
 
@@ -29,6 +44,10 @@ class ApiKeyMiddleware:
         api_keys: dict mapping api_key -> client_id,
                   or list of valid api_keys (client_id defaults to "anonymous")
         exclude_paths: paths that skip auth (default: ["/ping"])
+        constant_time: compare the presented key against every known key
+                       with ``hmac.compare_digest`` instead of a dict
+                       lookup, so response timing does not depend on the
+                       key (default: False)
 
     Example:
         from kiboup import KiboAgentApp
@@ -44,15 +63,22 @@ class ApiKeyMiddleware:
             return {"response": "hello", "called_by": who}
     """
 
-    def __init__(self, app: ASGIApp, api_keys, exclude_paths=None):
+    _API_KEY_BYTES = API_KEY_HEADER.encode()
+
+    def __init__(self, app: ASGIApp, api_keys, exclude_paths=None, constant_time: bool = False):
         self.app = app
         if isinstance(api_keys, dict):
-            self._keys = api_keys
+            items = api_keys.items()
         elif isinstance(api_keys, (list, tuple)):
-            self._keys = {k: "anonymous" for k in api_keys}
+            items = ((k, "anonymous") for k in api_keys)
         else:
             raise ValueError("api_keys must be a dict or list")
-        self._exclude = set(exclude_paths or ["/ping"])
+        # Keyed by the encoded key so raw header bytes can be looked up as-is.
+        self._keys = {
+            k if isinstance(k, bytes) else k.encode(): v for k, v in items
+        }
+        self._constant_time = constant_time
+        self._exclude = frozenset(exclude_paths or ("/ping",))
         self._logger = create_logger("kiboup.middleware")
 
     async def __call__(self, scope: Scope, receive: Receive, send: Send):
@@ -60,46 +86,58 @@ class ApiKeyMiddleware:
             await self.app(scope, receive, send)
             return
 
-        path = scope.get("path", "")
+        path = scope["path"]
         if path in self._exclude:
             await self.app(scope, receive, send)
             return
 
-        headers = dict(scope.get("headers", []))
-        api_key = headers.get(API_KEY_HEADER.encode(), b"").decode()
+        api_key = b""
+        for name, value in scope["headers"]:
+            if name == self._API_KEY_BYTES:
+                api_key = value
+                break
 
         if not api_key:
-            body = json.dumps({"error": "Missing API key", "header": API_KEY_HEADER}).encode()
-            await send({
-                "type": "http.response.start",
-                "status": 401,
-                "headers": [
-                    [b"content-type", b"application/json"],
-                    [b"content-length", str(len(body)).encode()],
-                ],
-            })
-            await send({"type": "http.response.body", "body": body})
+            await self._reject(send, _MISSING_KEY)
             return
 
-        client_id = self._keys.get(api_key)
+        client_id = self._lookup(api_key)
         if client_id is None:
-            body = json.dumps({"error": "Invalid API key"}).encode()
-            await send({
-                "type": "http.response.start",
-                "status": 403,
-                "headers": [
-                    [b"content-type", b"application/json"],
-                    [b"content-length", str(len(body)).encode()],
-                ],
-            })
-            await send({"type": "http.response.body", "body": body})
+            await self._reject(send, _INVALID_KEY)
             return
 
-        scope.setdefault("state", {})["client_id"] = client_id
-        method = scope.get("method", "")
-        self._logger.log(
-            logging.INFO,
-            "Request from client",
-            extra={"client_id": client_id, "method": method, "path": path},
-        )
+        # Servers usually provide scope["state"]; only allocate when missing.
+        state = scope.get("state")
+        if state is None:
+            scope["state"] = state = {}
+        state["client_id"] = client_id
+        if self._logger.isEnabledFor(logging.INFO):
+            self._logger.info(
+                "Request from client",
+                extra={
+                    "client_id": client_id,
+                    "method": scope.get("method", ""),
+                    "path": path,
+                },
+            )
         await self.app(scope, receive, send)
+
+    @staticmethod
+    async def _reject(send: Send, response):
+        status, headers, body = response
+        # Fresh message dicts/header list: outer middleware may mutate them.
+        await send({
+            "type": "http.response.start",
+            "status": status,
+            "headers": list(headers),
+        })
+        await send({"type": "http.response.body", "body": body})
+
+    def _lookup(self, api_key: bytes):
+        if not self._constant_time:
+            return self._keys.get(api_key)
+        client_id = None
+        for key, value in self._keys.items():
+            if hmac.compare_digest(api_key, key):
+                client_id = value
+        return client_id
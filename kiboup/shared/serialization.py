@@ -0,0 +1,47 @@
+"""JSON encoding helpers with an optional orjson fast path.
+
+``orjson`` is used when installed (``pip install kiboup[http]``);
+otherwise the stdlib ``json`` module is used. Both paths encode to
+UTF-8 ``bytes`` and decode from ``str``, ``bytes``, ``bytearray`` or
+``memoryview``.
+"""
+
+import json
+from typing import Any, Callable, Optional
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+HAS_ORJSON = orjson is not None
+
+if orjson is not None:
+    _DUMPS_OPTIONS = orjson.OPT_NON_STR_KEYS | orjson.OPT_SERIALIZE_NUMPY
+
+    def json_dumps(obj: Any, default: Optional[Callable[[Any], Any]] = None) -> bytes:
+        """Encode ``obj`` as compact UTF-8 JSON bytes.
+
+        ``default`` converts objects the encoder does not support natively.
+        """
+        return orjson.dumps(obj, default=default, option=_DUMPS_OPTIONS)
+
+    json_loads = orjson.loads
+
+else:
+
+    def json_dumps(obj: Any, default: Optional[Callable[[Any], Any]] = None) -> bytes:
+        """Encode ``obj`` as compact UTF-8 JSON bytes.
+
+        ``default`` converts objects the encoder does not support natively.
+        """
+        return json.dumps(
+            obj, ensure_ascii=False, separators=(",", ":"), default=default
+        ).encode("utf-8")
+
+    def json_loads(data: Any) -> Any:
+        """Decode JSON from text or a bytes-like object."""
+        if isinstance(data, memoryview):
+            data = bytes(data)
+        return json.loads(data)
+
@@ -2,76 +2,153 @@
 
 Provides a single import point for all commonly used Starlette types:
     from kiboup.shared.starlette import JSONResponse, Request, Route, ...
+
+Each name is imported from its Starlette module on first access, so
+importing this module does not load Starlette submodules (testclient,
+websockets, authentication, ...) that the caller never uses.
 """
 
-# --- applications ---
-from starlette.applications import Starlette
-
-# --- authentication ---
-from starlette.authentication import (
-    AuthCredentials,
-    AuthenticationBackend,
-    AuthenticationError,
-    BaseUser,
-    SimpleUser,
-    UnauthenticatedUser,
-    has_required_scope,
-    requires,
-)
-
-# --- background ---
-from starlette.background import BackgroundTask, BackgroundTasks
-
-# --- config ---
-from starlette.config import Config, Environ, EnvironError
-
-# --- datastructures ---
-from starlette.datastructures import (
-    URL,
-    Address,
-    FormData,
-    Headers,
-    ImmutableMultiDict,
-    MultiDict,
-    MutableHeaders,
-    QueryParams,
-    Secret,
-    State,
-    URLPath,
-    UploadFile,
-)
-
-# --- endpoints ---
-from starlette.endpoints import HTTPEndpoint, WebSocketEndpoint
-
-# --- exceptions ---
-from starlette.exceptions import HTTPException, WebSocketException
-
-# --- middleware ---
-from starlette.middleware import Middleware
-
-# --- requests ---
-from starlette.requests import HTTPConnection, Request
-
-# --- responses ---
-from starlette.responses import (
-    FileResponse,
-    HTMLResponse,
-    JSONResponse,
-    PlainTextResponse,
-    RedirectResponse,
-    Response,
-    StreamingResponse,
-)
-
-# --- routing ---
-from starlette.routing import BaseRoute, Host, Mount, Route, Router, WebSocketRoute
-
-# --- testclient ---
-from starlette.testclient import TestClient
-
-# --- websockets ---
-from starlette.websockets import WebSocket, WebSocketClose, WebSocketDisconnect, WebSocketState
+import importlib
+from typing import TYPE_CHECKING, Any
+
+if TYPE_CHECKING:
+    # --- applications ---
+    from starlette.applications import Starlette
+
+    # --- authentication ---
+    from starlette.authentication import (
+        AuthCredentials,
+        AuthenticationBackend,
+        AuthenticationError,
+        BaseUser,
+        SimpleUser,
+        UnauthenticatedUser,
+        has_required_scope,
+        requires,
+    )
+
+    # --- background ---
+    from starlette.background import BackgroundTask, BackgroundTasks
+
+    # --- config ---
+    from starlette.config import Config, Environ, EnvironError
+
+    # --- datastructures ---
+    from starlette.datastructures import (
+        URL,
+        Address,
+        FormData,
+        Headers,
+        ImmutableMultiDict,
+        MultiDict,
+        MutableHeaders,
+        QueryParams,
+        Secret,
+        State,
+        URLPath,
+        UploadFile,
+    )
+
+    # --- endpoints ---
+    from starlette.endpoints import HTTPEndpoint, WebSocketEndpoint
+
+    # --- exceptions ---
+    from starlette.exceptions import HTTPException, WebSocketException
+
+    # --- middleware ---
+    from starlette.middleware import Middleware
+
+    # --- requests ---
+    from starlette.requests import HTTPConnection, Request
+
+    # --- responses ---
+    from starlette.responses import (
+        FileResponse,
+        HTMLResponse,
+        JSONResponse,
+        PlainTextResponse,
+        RedirectResponse,
+        Response,
+        StreamingResponse,
+    )
+
+    # --- routing ---
+    from starlette.routing import BaseRoute, Host, Mount, Route, Router, WebSocketRoute
+
+    # --- testclient ---
+    from starlette.testclient import TestClient
+
+    # --- websockets ---
+    from starlette.websockets import WebSocket, WebSocketClose, WebSocketDisconnect, WebSocketState
+
+
+# Exported name -> Starlette module that defines it
+_LAZY = {
+    # applications
+    "Starlette": "starlette.applications",
+    # authentication
+    "AuthCredentials": "starlette.authentication",
+    "AuthenticationBackend": "starlette.authentication",
+    "AuthenticationError": "starlette.authentication",
+    "BaseUser": "starlette.authentication",
+    "SimpleUser": "starlette.authentication",
+    "UnauthenticatedUser": "starlette.authentication",
+    "has_required_scope": "starlette.authentication",
+    "requires": "starlette.authentication",
+    # background
+    "BackgroundTask": "starlette.background",
+    "BackgroundTasks": "starlette.background",
+    # config
+    "Config": "starlette.config",
+    "Environ": "starlette.config",
+    "EnvironError": "starlette.config",
+    # datastructures
+    "URL": "starlette.datastructures",
+    "Address": "starlette.datastructures",
+    "FormData": "starlette.datastructures",
+    "Headers": "starlette.datastructures",
+    "ImmutableMultiDict": "starlette.datastructures",
+    "MultiDict": "starlette.datastructures",
+    "MutableHeaders": "starlette.datastructures",
+    "QueryParams": "starlette.datastructures",
+    "Secret": "starlette.datastructures",
+    "State": "starlette.datastructures",
+    "URLPath": "starlette.datastructures",
+    "UploadFile": "starlette.datastructures",
+    # endpoints
+    "HTTPEndpoint": "starlette.endpoints",
+    "WebSocketEndpoint": "starlette.endpoints",
+    # exceptions
+    "HTTPException": "starlette.exceptions",
+    "WebSocketException": "starlette.exceptions",
+    # middleware
+    "Middleware": "starlette.middleware",
+    # requests
+    "HTTPConnection": "starlette.requests",
+    "Request": "starlette.requests",
+    # responses
+    "FileResponse": "starlette.responses",
+    "HTMLResponse": "starlette.responses",
+    "JSONResponse": "starlette.responses",
+    "PlainTextResponse": "starlette.responses",
+    "RedirectResponse": "starlette.responses",
+    "Response": "starlette.responses",
+    "StreamingResponse": "starlette.responses",
+    # routing
+    "BaseRoute": "starlette.routing",
+    "Host": "starlette.routing",
+    "Mount": "starlette.routing",
+    "Route": "starlette.routing",
+    "Router": "starlette.routing",
+    "WebSocketRoute": "starlette.routing",
+    # testclient
+    "TestClient": "starlette.testclient",
+    # websockets
+    "WebSocket": "starlette.websockets",
+    "WebSocketClose": "starlette.websockets",
+    "WebSocketDisconnect": "starlette.websockets",
+    "WebSocketState": "starlette.websockets",
+}
 
 __all__ = [
     # applications
@@ -139,3 +216,12 @@ __all__ = [
     "WebSocketDisconnect",
     "WebSocketState",
 ]
+
+
+def __getattr__(name: str) -> Any:
+    module_name = _LAZY.get(name)
+    if module_name is None:
+        raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+    value = getattr(importlib.import_module(module_name), name)
+    globals()[name] = value
+    return value
@@ -8,7 +8,7 @@ import logging
 from typing import Any, Dict, List, Optional
 
 from kiboup.studio.db import SQLiteStore
-from kiboup.studio.entities import Span, SpanKind, Trace, _utc_now
+from kiboup.studio.entities import Span, SpanKind, Trace, _SPAN_KINDS, _utc_now
 
 
 class SpanCollector:
@@ -54,43 +54,32 @@ class SpanCollector:
         if not trace_id or not raw_spans:
             return {"error": "trace_id and spans are required", "accepted": 0}
 
-        existing_trace = self._store.get_trace(trace_id)
-        if not existing_trace:
-            start_times = [s.get("start_time", "") for s in raw_spans if s.get("start_time")]
-            end_times = [s.get("end_time", "") for s in raw_spans if s.get("end_time")]
-
-            trace = Trace(
-                trace_id=trace_id,
-                agent_id=agent_id,
-                session_id=session_id,
-                request_id=request_id,
-                start_time=min(start_times) if start_times else _utc_now(),
-                end_time=max(end_times) if end_times else None,
-                status="ok",
-            )
-            durations = [s.get("duration_ms", 0) for s in raw_spans if s.get("duration_ms")]
-            if durations:
-                trace.duration_ms = max(durations)
-            self._store.save_trace(trace)
-
-        accepted = 0
+        now = _utc_now()
+        min_start = None
+        max_end = None
+        max_duration = None
+        spans: List[Span] = []
         for raw in raw_spans:
-            try:
-                kind_str = raw.get("kind", "custom")
-                try:
-                    kind = SpanKind(kind_str)
-                except ValueError:
-                    kind = SpanKind.CUSTOM
+            start_time = raw.get("start_time")
+            if start_time and (min_start is None or start_time < min_start):
+                min_start = start_time
+            end_time = raw.get("end_time")
+            if end_time and (max_end is None or end_time > max_end):
+                max_end = end_time
+            duration_ms = raw.get("duration_ms")
+            if duration_ms and (max_duration is None or duration_ms > max_duration):
+                max_duration = duration_ms
 
-                span = Span(
+            try:
+                spans.append(Span(
                     span_id=raw.get("span_id", ""),
                     trace_id=trace_id,
                     parent_span_id=raw.get("parent_span_id"),
                     name=raw.get("name", "unknown"),
-                    kind=kind,
-                    start_time=raw.get("start_time", _utc_now()),
-                    end_time=raw.get("end_time"),
-                    duration_ms=raw.get("duration_ms"),
+                    kind=_SPAN_KINDS.get(raw.get("kind"), SpanKind.CUSTOM),
+                    start_time=start_time if start_time is not None else now,
+                    end_time=end_time,
+                    duration_ms=duration_ms,
                     status=raw.get("status", "ok"),
                     attributes=raw.get("attributes", {}),
                     events=raw.get("events", []),
@@ -98,19 +87,42 @@ class SpanCollector:
                     output_data=raw.get("output_data"),
                     error=raw.get("error"),
                     agent_id=agent_id,
-                )
-                self._store.save_span(span)
-                accepted += 1
+                ))
             except Exception as exc:
                 if self._logger:
                     self._logger.warning("Failed to ingest span: %s", exc)
 
-        if existing_trace:
-            updated = self._store.get_trace(trace_id)
-            if updated and end_times:
-                latest_end = max(end_times)
-                if not updated.end_time or latest_end > updated.end_time:
-                    updated.end_time = latest_end
-                    self._store.save_trace(updated)
+        existing_trace = self._store.get_trace(trace_id)
+        if not existing_trace:
+            trace = Trace(
+                trace_id=trace_id,
+                agent_id=agent_id,
+                session_id=session_id,
+                request_id=request_id,
+                start_time=min_start or now,
+                end_time=max_end,
+                status="ok",
+            )
+            if max_duration:
+                trace.duration_ms = max_duration
+            self._store.save_trace(trace)
+
+        try:
+            self._store.save_spans(spans)
+            accepted = len(spans)
+        except Exception:
+            # The batch is rolled back as a whole; retry span by span so one
+            # bad span (e.g. a NOT NULL violation) only drops itself.
+            accepted = 0
+            for span in spans:
+                try:
+                    self._store.save_span(span)
+                    accepted += 1
+                except Exception as exc:
+                    if self._logger:
+                        self._logger.warning("Failed to ingest span: %s", exc)
+
+        if existing_trace and max_end:
+            self._store.bump_trace_end_time(trace_id, max_end)
 
         return {"trace_id": trace_id, "accepted": accepted, "total": len(raw_spans)}
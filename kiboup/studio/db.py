@@ -3,12 +3,15 @@
 SQLite-based storage with abstract interface for future Redis/Postgres backends.
 """
 
-import json
 import sqlite3
+import threading
+import weakref
+from collections import defaultdict
 from contextlib import contextmanager
 from pathlib import Path
-from typing import Any, Dict, List, Optional, Protocol
+from typing import Any, Dict, Iterator, List, Optional, Protocol, Tuple
 
+from kiboup.shared.serialization import json_dumps, json_loads
 from kiboup.studio.entities import (
     AgentRegistration,
     AgentStatus,
@@ -25,7 +28,7 @@ from kiboup.studio.entities import (
     SessionMessage,
     Span,
     Trace,
-    _utc_now,
+    _SPAN_KINDS,
 )
 
 
@@ -35,13 +38,25 @@ class StudioStore(Protocol):
     # -- Traces --
     def save_trace(self, trace: Trace) -> None: ...
     def get_trace(self, trace_id: str) -> Optional[Trace]: ...
-    def list_traces(self, limit: int = 50, offset: int = 0, agent_id: Optional[str] = None) -> List[Trace]: ...
+    def bump_trace_end_time(self, trace_id: str, end_time: str) -> None: ...
+    def list_traces(
+        self, limit: int = 50, offset: int = 0, agent_id: Optional[str] = None,
+        before: Optional[str] = None, before_id: Optional[str] = None,
+    ) -> List[Trace]: ...
+    def list_traces_with_spans(
+        self, limit: int = 50, offset: int = 0, agent_id: Optional[str] = None,
+        before: Optional[str] = None, before_id: Optional[str] = None,
+    ) -> List[Tuple[Trace, List[Dict[str, Any]]]]: ...
     def delete_trace(self, trace_id: str) -> bool: ...
 
     # -- Spans --
     def save_span(self, span: Span) -> None: ...
+    def save_spans(self, spans: List[Span]) -> None: ...
     def get_span(self, span_id: str) -> Optional[Span]: ...
     def list_spans_by_trace(self, trace_id: str) -> List[Span]: ...
+    def iter_spans_by_trace(self, trace_id: str) -> Iterator[Span]: ...
+    def list_span_summaries(self, trace_id: str) -> List[Dict[str, Any]]: ...
+    def list_spans_for_traces(self, trace_ids: List[str]) -> Dict[str, List[Span]]: ...
 
     # -- Prompts --
     def save_prompt(self, prompt: PromptTemplate) -> None: ...
@@ -89,6 +104,49 @@ class StudioStore(Protocol):
     def list_eval_cases(self, eval_set_id: str) -> List[EvalCase]: ...
 
 
+# Bound parameters per statement, under SQLite's historical limit of 999.
+_SQL_MAX_VARS = 900
+
+# Rows fetched per statement by iter_spans_by_trace; each page finishes
+# its statement so no read snapshot outlives it.
+_SPAN_PAGE_SIZE = 256
+
+
+class _ReadConnection:
+    """A thread's read-only connection, closed once the thread-local drops it."""
+
+    __slots__ = ("conn", "__weakref__")
+
+    def __init__(self, conn: sqlite3.Connection):
+        self.conn = conn
+        weakref.finalize(self, conn.close)
+
+
+def _dumps(obj: Any) -> str:
+    """Encode ``obj`` as JSON text for a TEXT column."""
+    return json_dumps(obj).decode("utf-8")
+
+
+# WAL with synchronous=NORMAL only fsyncs at checkpoints; the rest keeps
+# temp tables in RAM and gives each connection a 64MB page cache and mmap.
+_PRAGMAS = (
+    "journal_mode=WAL",
+    "synchronous=NORMAL",
+    "temp_store=MEMORY",
+    "cache_size=-64000",
+    "mmap_size=268435456",
+    "foreign_keys=ON",
+    "busy_timeout=5000",
+)
+
+# Read-only connections skip the journal/sync/foreign-key settings
+_READ_PRAGMAS = (
+    "temp_store=MEMORY",
+    "cache_size=-64000",
+    "mmap_size=268435456",
+    "busy_timeout=5000",
+)
+
 _SCHEMA = """
 CREATE TABLE IF NOT EXISTS traces (
     trace_id TEXT PRIMARY KEY,
@@ -113,10 +171,10 @@ CREATE TABLE IF NOT EXISTS spans (
     end_time TEXT,
     duration_ms REAL,
     status TEXT DEFAULT 'ok',
-    attributes TEXT DEFAULT '{}',
-    events TEXT DEFAULT '[]',
-    input_data TEXT,
-    output_data TEXT,
+    attributes BLOB DEFAULT '{}',
+    events BLOB DEFAULT '[]',
+    input_data BLOB,
+    output_data BLOB,
     error TEXT,
     agent_id TEXT,
     FOREIGN KEY (trace_id) REFERENCES traces(trace_id) ON DELETE CASCADE
@@ -186,7 +244,7 @@ CREATE TABLE IF NOT EXISTS feature_flags (
     description TEXT DEFAULT '',
     updated_at TEXT NOT NULL,
     UNIQUE(agent_id, name)
-);
+) WITHOUT ROWID;
 
 CREATE TABLE IF NOT EXISTS parameters (
     param_id TEXT PRIMARY KEY,
@@ -196,11 +254,11 @@ CREATE TABLE IF NOT EXISTS parameters (
     description TEXT DEFAULT '',
     updated_at TEXT NOT NULL,
     UNIQUE(agent_id, name)
-);
+) WITHOUT ROWID;
 
-CREATE INDEX IF NOT EXISTS idx_spans_trace_id ON spans(trace_id);
-CREATE INDEX IF NOT EXISTS idx_traces_agent_id ON traces(agent_id);
-CREATE INDEX IF NOT EXISTS idx_traces_start_time ON traces(start_time);
+CREATE INDEX IF NOT EXISTS idx_spans_trace_start ON spans(trace_id, start_time);
+CREATE INDEX IF NOT EXISTS idx_traces_agent_start_id ON traces(agent_id, start_time, trace_id);
+CREATE INDEX IF NOT EXISTS idx_traces_start_id ON traces(start_time, trace_id);
 CREATE INDEX IF NOT EXISTS idx_evaluations_trace_id ON evaluations(trace_id);
 CREATE INDEX IF NOT EXISTS idx_agents_status ON agents(status);
 CREATE INDEX IF NOT EXISTS idx_feature_flags_agent ON feature_flags(agent_id);
@@ -229,7 +287,7 @@ CREATE TABLE IF NOT EXISTS eval_sets (
     name TEXT NOT NULL,
     agent_id TEXT NOT NULL DEFAULT '',
     created_at TEXT NOT NULL
-);
+) WITHOUT ROWID;
 
 CREATE TABLE IF NOT EXISTS eval_cases (
     case_id TEXT PRIMARY KEY,
@@ -242,167 +300,420 @@ CREATE TABLE IF NOT EXISTS eval_cases (
     FOREIGN KEY (session_id) REFERENCES sessions(session_id) ON DELETE CASCADE
 );
 
-CREATE INDEX IF NOT EXISTS idx_sessions_agent ON sessions(agent_id);
-CREATE INDEX IF NOT EXISTS idx_session_messages_session ON session_messages(session_id);
-CREATE INDEX IF NOT EXISTS idx_eval_cases_set ON eval_cases(eval_set_id);
+CREATE INDEX IF NOT EXISTS idx_sessions_agent_updated ON sessions(agent_id, updated_at DESC);
+CREATE INDEX IF NOT EXISTS idx_messages_session_created ON session_messages(session_id, created_at);
+CREATE INDEX IF NOT EXISTS idx_eval_cases_set_created ON eval_cases(eval_set_id, created_at);
+
+-- Superseded by the composite indices above
+DROP INDEX IF EXISTS idx_spans_trace_id;
+DROP INDEX IF EXISTS idx_traces_agent_id;
+DROP INDEX IF EXISTS idx_sessions_agent;
+DROP INDEX IF EXISTS idx_session_messages_session;
+DROP INDEX IF EXISTS idx_eval_cases_set;
+DROP INDEX IF EXISTS idx_traces_agent_start;
+DROP INDEX IF EXISTS idx_traces_start_time;
+
+CREATE TRIGGER IF NOT EXISTS trg_spans_ai AFTER INSERT ON spans
+BEGIN
+    UPDATE traces SET span_count = span_count + 1 WHERE trace_id = NEW.trace_id;
+END;
+
+CREATE TRIGGER IF NOT EXISTS trg_spans_ad AFTER DELETE ON spans
+BEGIN
+    UPDATE traces SET span_count = span_count - 1 WHERE trace_id = OLD.trace_id;
+END;
+
+CREATE TRIGGER IF NOT EXISTS trg_spans_au AFTER UPDATE OF trace_id ON spans
+WHEN NEW.trace_id IS NOT OLD.trace_id
+BEGIN
+    UPDATE traces SET span_count = span_count - 1 WHERE trace_id = OLD.trace_id;
+    UPDATE traces SET span_count = span_count + 1 WHERE trace_id = NEW.trace_id;
+END;
+
+CREATE TRIGGER IF NOT EXISTS trg_messages_touch AFTER INSERT ON session_messages
+BEGIN
+    UPDATE sessions SET updated_at = NEW.created_at WHERE session_id = NEW.session_id;
+END;
 """
 
 
+# Span attributes are stored as JSON bytes; CAST keeps newer SQLite builds
+# from reading the BLOB as JSONB.
+_SQL_SPAN_SUMMARIES = """SELECT span_id, parent_span_id, name, kind, start_time,
+        end_time, duration_ms, status, error,
+        json_extract(CAST(attributes AS TEXT), '$."llm.model"') AS llm_model,
+        json_extract(CAST(attributes AS TEXT), '$."llm.input_tokens"') AS llm_input_tokens,
+        json_extract(CAST(attributes AS TEXT), '$."llm.output_tokens"') AS llm_output_tokens,
+        json_extract(CAST(attributes AS TEXT), '$."llm.total_tokens"') AS llm_total_tokens
+    FROM spans WHERE trace_id = ? ORDER BY start_time ASC"""
+
+# Explicit column order for the positional trace/span row mappers
+_TRACE_COLUMNS = (
+    "trace_id, agent_id, session_id, request_id, start_time, end_time, "
+    "duration_ms, status, metadata, span_count"
+)
+_SPAN_COLUMNS = (
+    "span_id, trace_id, parent_span_id, name, kind, start_time, end_time, "
+    "duration_ms, status, attributes, events, input_data, output_data, error, agent_id"
+)
+
+# Traces and spans are written with upserts: INSERT OR REPLACE deletes the
+# existing row first, which cascades to its children. span_count is owned
+# by the trg_spans_* triggers: a new trace starts at 0, an existing one
+# keeps its count, and Trace.span_count is never written.
+_SQL_INSERT_TRACE = """INSERT INTO traces
+    (trace_id, agent_id, session_id, request_id, start_time, end_time,
+     duration_ms, status, metadata, span_count)
+    VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, 0)
+    ON CONFLICT(trace_id) DO UPDATE SET
+        agent_id = excluded.agent_id, session_id = excluded.session_id,
+        request_id = excluded.request_id, start_time = excluded.start_time,
+        end_time = excluded.end_time, duration_ms = excluded.duration_ms,
+        status = excluded.status, metadata = excluded.metadata"""
+
+_SQL_INSERT_SPAN = """INSERT INTO spans
+    (span_id, trace_id, parent_span_id, name, kind, start_time, end_time,
+     duration_ms, status, attributes, events, input_data, output_data, error, agent_id)
+    VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
+    ON CONFLICT(span_id) DO UPDATE SET
+        trace_id = excluded.trace_id, parent_span_id = excluded.parent_span_id,
+        name = excluded.name, kind = excluded.kind,
+        start_time = excluded.start_time, end_time = excluded.end_time,
+        duration_ms = excluded.duration_ms, status = excluded.status,
+        attributes = excluded.attributes, events = excluded.events,
+        input_data = excluded.input_data, output_data = excluded.output_data,
+        error = excluded.error, agent_id = excluded.agent_id"""
+
+_SQL_INSERT_AGENT = """INSERT OR REPLACE INTO agents
+    (agent_id, name, protocol, endpoint, capabilities, version,
+     metadata, status, registered_at, last_heartbeat,
+     heartbeat_interval_s, uptime_seconds, active_tasks,
+     error_count_last_5m, memory_mb)
+    VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)"""
+
+_SQL_TRACES_WITH_SPANS = """SELECT {cols}, COALESCE((
+        SELECT json_group_array(json_object(
+            'span_id', s.span_id, 'parent_span_id', s.parent_span_id,
+            'name', s.name, 'kind', s.kind, 'start_time', s.start_time,
+            'end_time', s.end_time, 'duration_ms', s.duration_ms, 'status', s.status))
+        FROM (SELECT * FROM spans WHERE trace_id = t.trace_id ORDER BY start_time) AS s
+    ), '[]') AS spans_json
+    FROM traces t {where}ORDER BY t.start_time DESC, t.trace_id DESC LIMIT ? OFFSET ?"""
+
+
 class SQLiteStore:
     """SQLite-based implementation of StudioStore."""
 
     def __init__(self, db_path: str = "kibostudio.db"):
         self._db_path = db_path
         self._persistent_conn: sqlite3.Connection | None = None
+        # File databases: one shared read-write connection for writers and
+        # a lazily opened read-only connection per thread for queries. WAL
+        # lets those readers run while a write is in progress.
+        self._write_conn: sqlite3.Connection | None = None
+        self._write_lock = threading.RLock()
+        # Readers live only as long as their thread; the weak set lets
+        # close() reach the ones still alive.
+        self._local = threading.local()
+        self._readers: "weakref.WeakSet[_ReadConnection]" = weakref.WeakSet()
         if db_path == ":memory:":
             self._persistent_conn = sqlite3.connect(":memory:")
-            self._persistent_conn.execute("PRAGMA journal_mode=WAL")
-            self._persistent_conn.execute("PRAGMA foreign_keys=ON")
+            self._apply_pragmas(self._persistent_conn)
             self._persistent_conn.row_factory = sqlite3.Row
         self._init_db()
 
     def _init_db(self):
-        with self._conn() as conn:
+        with self._write() as conn:
             conn.executescript(_SCHEMA)
 
+    @staticmethod
+    def _apply_pragmas(conn: sqlite3.Connection, pragmas=_PRAGMAS) -> None:
+        for pragma in pragmas:
+            conn.execute(f"PRAGMA {pragma}")
+
+    def _connect(self, read_only: bool) -> sqlite3.Connection:
+        if read_only:
+            uri = Path(self._db_path).absolute().as_uri() + "?mode=ro"
+            conn = sqlite3.connect(
+                uri, uri=True, check_same_thread=False, cached_statements=256
+            )
+            self._apply_pragmas(conn, _READ_PRAGMAS)
+        else:
+            conn = sqlite3.connect(
+                self._db_path, check_same_thread=False, cached_statements=256
+            )
+            self._apply_pragmas(conn)
+        conn.row_factory = sqlite3.Row
+        return conn
+
     @contextmanager
-    def _conn(self):
+    def _read(self):
         if self._persistent_conn is not None:
             yield self._persistent_conn
-            self._persistent_conn.commit()
             return
-        conn = sqlite3.connect(self._db_path)
-        conn.execute("PRAGMA journal_mode=WAL")
-        conn.execute("PRAGMA foreign_keys=ON")
-        conn.row_factory = sqlite3.Row
-        try:
-            yield conn
+        reader = getattr(self._local, "reader", None)
+        if reader is None:
+            reader = self._local.reader = _ReadConnection(self._connect(read_only=True))
+            self._readers.add(reader)
+        yield reader.conn
+
+    @contextmanager
+    def _write(self):
+        with self._write_lock:
+            conn = self._persistent_conn
+            if conn is None:
+                conn = self._write_conn
+                if conn is None:
+                    conn = self._write_conn = self._connect(read_only=False)
+                    # Closed at interpreter exit or when the store is
+                    # collected, without atexit pinning the store itself.
+                    weakref.finalize(self, conn.close)
+            try:
+                yield conn
+            except BaseException:
+                conn.rollback()
+                raise
             conn.commit()
-        finally:
+
+    def close(self) -> None:
+        """Close the connections opened by this store."""
+        conns = [reader.conn for reader in list(self._readers)]
+        self._readers = weakref.WeakSet()
+        with self._write_lock:
+            if self._write_conn is not None:
+                conns.append(self._write_conn)
+                self._write_conn = None
+        for conn in conns:
             conn.close()
+        self._local = threading.local()
 
     # -- Traces --
 
     def save_trace(self, trace: Trace) -> None:
-        with self._conn() as conn:
+        with self._write() as conn:
             conn.execute(
-                """INSERT OR REPLACE INTO traces
-                (trace_id, agent_id, session_id, request_id, start_time, end_time,
-                 duration_ms, status, metadata, span_count)
-                VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?)""",
+                _SQL_INSERT_TRACE,
                 (
                     trace.trace_id, trace.agent_id, trace.session_id, trace.request_id,
                     trace.start_time, trace.end_time, trace.duration_ms, trace.status,
-                    json.dumps(trace.metadata), trace.span_count,
+                    _dumps(trace.metadata),
                 ),
             )
 
+    def bump_trace_end_time(self, trace_id: str, end_time: str) -> None:
+        """Move a trace's end_time forward if ``end_time`` is later."""
+        with self._write() as conn:
+            conn.execute(
+                "UPDATE traces SET end_time = ? WHERE trace_id = ? AND (end_time IS NULL OR end_time < ?)",
+                (end_time, trace_id, end_time),
+            )
+
     def get_trace(self, trace_id: str) -> Optional[Trace]:
-        with self._conn() as conn:
-            row = conn.execute("SELECT * FROM traces WHERE trace_id = ?", (trace_id,)).fetchone()
+        with self._read() as conn:
+            row = conn.execute(
+                f"SELECT {_TRACE_COLUMNS} FROM traces WHERE trace_id = ?", (trace_id,)
+            ).fetchone()
             if not row:
                 return None
             return self._row_to_trace(row)
 
-    def list_traces(self, limit: int = 50, offset: int = 0, agent_id: Optional[str] = None) -> List[Trace]:
-        with self._conn() as conn:
-            if agent_id:
-                rows = conn.execute(
-                    "SELECT * FROM traces WHERE agent_id = ? ORDER BY start_time DESC LIMIT ? OFFSET ?",
-                    (agent_id, limit, offset),
-                ).fetchall()
-            else:
-                rows = conn.execute(
-                    "SELECT * FROM traces ORDER BY start_time DESC LIMIT ? OFFSET ?",
-                    (limit, offset),
-                ).fetchall()
+    @staticmethod
+    def _trace_filters(
+        agent_id: Optional[str], before: Optional[str], before_id: Optional[str]
+    ) -> Tuple[str, list]:
+        conditions = []
+        params: list = []
+        if agent_id:
+            conditions.append("t.agent_id = ?")
+            params.append(agent_id)
+        if before and before_id:
+            conditions.append("(t.start_time, t.trace_id) < (?, ?)")
+            params.extend((before, before_id))
+        elif before:
+            conditions.append("t.start_time < ?")
+            params.append(before)
+        if not conditions:
+            return "", params
+        return "WHERE " + " AND ".join(conditions) + " ", params
+
+    def list_traces(
+        self,
+        limit: int = 50,
+        offset: int = 0,
+        agent_id: Optional[str] = None,
+        before: Optional[str] = None,
+        before_id: Optional[str] = None,
+    ) -> List[Trace]:
+        """List traces newest first.
+
+        Page with ``before``/``before_id``: pass the ``start_time`` and
+        ``trace_id`` of the last trace of the previous page. This seeks on
+        the (start_time, trace_id) index instead of skipping rows, so deep
+        pages cost the same as the first one and traces sharing a
+        start_time are never skipped.
+        ``offset`` is still honoured but deprecated.
+        """
+        where, params = self._trace_filters(agent_id, before, before_id)
+        with self._read() as conn:
+            rows = conn.execute(
+                f"SELECT {_TRACE_COLUMNS} FROM traces t {where}"
+                "ORDER BY t.start_time DESC, t.trace_id DESC LIMIT ? OFFSET ?",
+                (*params, limit, offset),
+            )
             return [self._row_to_trace(r) for r in rows]
 
+    def list_traces_with_spans(
+        self,
+        limit: int = 50,
+        offset: int = 0,
+        agent_id: Optional[str] = None,
+        before: Optional[str] = None,
+        before_id: Optional[str] = None,
+    ) -> List[Tuple[Trace, List[Dict[str, Any]]]]:
+        """List traces with a summary of their spans in a single query.
+
+        Each span summary holds span_id, parent_span_id, name, kind,
+        start_time, end_time, duration_ms and status, ordered by start_time.
+        Paging works as in ``list_traces``.
+        """
+        where, params = self._trace_filters(agent_id, before, before_id)
+        with self._read() as conn:
+            rows = conn.execute(
+                _SQL_TRACES_WITH_SPANS.format(cols=_TRACE_COLUMNS, where=where),
+                (*params, limit, offset),
+            ).fetchall()
+            return [(self._row_to_trace(r), json_loads(r[-1])) for r in rows]
+
     def delete_trace(self, trace_id: str) -> bool:
-        with self._conn() as conn:
+        with self._write() as conn:
             cursor = conn.execute("DELETE FROM traces WHERE trace_id = ?", (trace_id,))
             return cursor.rowcount > 0
 
     # -- Spans --
 
     def save_span(self, span: Span) -> None:
-        with self._conn() as conn:
-            conn.execute(
-                """INSERT OR REPLACE INTO spans
-                (span_id, trace_id, parent_span_id, name, kind, start_time, end_time,
-                 duration_ms, status, attributes, events, input_data, output_data, error, agent_id)
-                VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)""",
-                (
-                    span.span_id, span.trace_id, span.parent_span_id, span.name,
-                    span.kind.value if isinstance(span.kind, SpanKind) else span.kind,
-                    span.start_time, span.end_time, span.duration_ms, span.status,
-                    json.dumps(span.attributes), json.dumps(span.events),
-                    json.dumps(span.input_data) if span.input_data else None,
-                    json.dumps(span.output_data) if span.output_data else None,
-                    span.error, span.agent_id,
-                ),
-            )
-            conn.execute(
-                "UPDATE traces SET span_count = (SELECT COUNT(*) FROM spans WHERE trace_id = ?) WHERE trace_id = ?",
-                (span.trace_id, span.trace_id),
-            )
+        with self._write() as conn:
+            conn.execute(_SQL_INSERT_SPAN, self._span_row(span))
+
+    def save_spans(self, spans: List[Span]) -> None:
+        """Insert a batch of spans in a single transaction."""
+        if not spans:
+            return
+        with self._write() as conn:
+            conn.executemany(_SQL_INSERT_SPAN, map(self._span_row, spans))
 
     def get_span(self, span_id: str) -> Optional[Span]:
-        with self._conn() as conn:
-            row = conn.execute("SELECT * FROM spans WHERE span_id = ?", (span_id,)).fetchone()
+        with self._read() as conn:
+            row = conn.execute(
+                f"SELECT {_SPAN_COLUMNS} FROM spans WHERE span_id = ?", (span_id,)
+            ).fetchone()
             if not row:
                 return None
             return self._row_to_span(row)
 
     def list_spans_by_trace(self, trace_id: str) -> List[Span]:
-        with self._conn() as conn:
-            rows = conn.execute(
-                "SELECT * FROM spans WHERE trace_id = ? ORDER BY start_time ASC",
-                (trace_id,),
-            ).fetchall()
-            return [self._row_to_span(r) for r in rows]
+        return list(self.iter_spans_by_trace(trace_id))
+
+    def iter_spans_by_trace(self, trace_id: str) -> Iterator[Span]:
+        """Yield a trace's spans a page at a time.
+
+        Pages are keyed on ``(start_time, span_id)`` and each one is read
+        to the end, so an iterator abandoned midway holds no open
+        statement or read snapshot.
+        """
+        sql = (
+            f"SELECT {_SPAN_COLUMNS} FROM spans WHERE trace_id = ?{{after}} "
+            "ORDER BY start_time ASC, span_id ASC LIMIT ?"
+        )
+        first = sql.format(after="")
+        following = sql.format(after=" AND (start_time, span_id) > (?, ?)")
+        with self._read() as conn:
+            rows = conn.execute(first, (trace_id, _SPAN_PAGE_SIZE)).fetchall()
+        while rows:
+            for r in rows:
+                yield self._row_to_span(r)
+            if len(rows) < _SPAN_PAGE_SIZE:
+                return
+            last = rows[-1]
+            with self._read() as conn:
+                rows = conn.execute(
+                    following,
+                    (trace_id, last["start_time"], last["span_id"], _SPAN_PAGE_SIZE),
+                ).fetchall()
+
+    def list_span_summaries(self, trace_id: str) -> List[Dict[str, Any]]:
+        """List a trace's spans without their payloads.
+
+        The LLM attributes shown in the timeline (``llm.model`` and token
+        counts) are projected with ``json_extract``, so attributes, events
+        and input/output data are never decoded in Python.
+        """
+        with self._read() as conn:
+            rows = conn.execute(_SQL_SPAN_SUMMARIES, (trace_id,))
+            return [dict(r) for r in rows]
+
+    def list_spans_for_traces(self, trace_ids: List[str]) -> Dict[str, List[Span]]:
+        """Fetch the spans of several traces at once, keyed by trace_id."""
+        out: Dict[str, List[Span]] = defaultdict(list)
+        ids = list(dict.fromkeys(trace_ids))
+        with self._read() as conn:
+            for i in range(0, len(ids), _SQL_MAX_VARS):
+                chunk = ids[i:i + _SQL_MAX_VARS]
+                rows = conn.execute(
+                    f"SELECT {_SPAN_COLUMNS} FROM spans WHERE trace_id IN ({','.join('?' * len(chunk))}) "
+                    "ORDER BY trace_id, start_time ASC",
+                    chunk,
+                )
+                for r in rows:
+                    span = self._row_to_span(r)
+                    out[span.trace_id].append(span)
+        return out
 
     # -- Prompts --
 
     def save_prompt(self, prompt: PromptTemplate) -> None:
-        with self._conn() as conn:
+        with self._write() as conn:
             conn.execute(
-                """INSERT OR REPLACE INTO prompts
+                """INSERT INTO prompts
                 (prompt_id, name, description, tags, active_version, created_at, updated_at)
-                VALUES (?, ?, ?, ?, ?, ?, ?)""",
+                VALUES (?, ?, ?, ?, ?, ?, ?)
+                ON CONFLICT(prompt_id) DO UPDATE SET
+                    name = excluded.name, description = excluded.description,
+                    tags = excluded.tags, active_version = excluded.active_version,
+                    created_at = excluded.created_at, updated_at = excluded.updated_at""",
                 (
                     prompt.prompt_id, prompt.name, prompt.description,
-                    json.dumps(prompt.tags), prompt.active_version,
+                    _dumps(prompt.tags), prompt.active_version,
                     prompt.created_at, prompt.updated_at,
                 ),
             )
 
     def get_prompt(self, prompt_id: str) -> Optional[PromptTemplate]:
-        with self._conn() as conn:
+        with self._read() as conn:
             row = conn.execute("SELECT * FROM prompts WHERE prompt_id = ?", (prompt_id,)).fetchone()
             if not row:
                 return None
             return self._row_to_prompt(row)
 
     def get_prompt_by_name(self, name: str) -> Optional[PromptTemplate]:
-        with self._conn() as conn:
+        with self._read() as conn:
             row = conn.execute("SELECT * FROM prompts WHERE name = ?", (name,)).fetchone()
             if not row:
                 return None
             return self._row_to_prompt(row)
 
     def list_prompts(self) -> List[PromptTemplate]:
-        with self._conn() as conn:
+        with self._read() as conn:
             rows = conn.execute("SELECT * FROM prompts ORDER BY updated_at DESC").fetchall()
             return [self._row_to_prompt(r) for r in rows]
 
     def delete_prompt(self, prompt_id: str) -> bool:
-        with self._conn() as conn:
+        with self._write() as conn:
             cursor = conn.execute("DELETE FROM prompts WHERE prompt_id = ?", (prompt_id,))
             return cursor.rowcount > 0
 
     def save_prompt_version(self, version: PromptVersion) -> None:
-        with self._conn() as conn:
+        with self._write() as conn:
             conn.execute(
                 """INSERT OR REPLACE INTO prompt_versions
                 (version_id, prompt_id, version, content, model_config, variables,
@@ -410,14 +721,14 @@ class SQLiteStore:
                 VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)""",
                 (
                     version.version_id, version.prompt_id, version.version,
-                    version.content, json.dumps(version.model_config),
-                    json.dumps(version.variables), json.dumps(version.metadata),
+                    version.content, _dumps(version.model_config),
+                    _dumps(version.variables), _dumps(version.metadata),
                     1 if version.is_active else 0, version.created_at,
                 ),
             )
 
     def list_prompt_versions(self, prompt_id: str) -> List[PromptVersion]:
-        with self._conn() as conn:
+        with self._read() as conn:
             rows = conn.execute(
                 "SELECT * FROM prompt_versions WHERE prompt_id = ? ORDER BY version DESC",
                 (prompt_id,),
@@ -425,7 +736,7 @@ class SQLiteStore:
             return [self._row_to_prompt_version(r) for r in rows]
 
     def get_active_version(self, prompt_id: str) -> Optional[PromptVersion]:
-        with self._conn() as conn:
+        with self._read() as conn:
             row = conn.execute(
                 "SELECT * FROM prompt_versions WHERE prompt_id = ? AND is_active = 1",
                 (prompt_id,),
@@ -437,7 +748,7 @@ class SQLiteStore:
     # -- Evaluations --
 
     def save_eval(self, result: EvalResult) -> None:
-        with self._conn() as conn:
+        with self._write() as conn:
             conn.execute(
                 """INSERT OR REPLACE INTO evaluations
                 (eval_id, trace_id, agent_id, metrics, status, error, details,
@@ -445,22 +756,22 @@ class SQLiteStore:
                 VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)""",
                 (
                     result.eval_id, result.trace_id, result.agent_id,
-                    json.dumps(result.metrics),
+                    _dumps(result.metrics),
                     result.status.value if isinstance(result.status, EvalStatus) else result.status,
-                    result.error, json.dumps(result.details),
+                    result.error, _dumps(result.details),
                     result.created_at, result.completed_at,
                 ),
             )
 
     def get_eval(self, eval_id: str) -> Optional[EvalResult]:
-        with self._conn() as conn:
+        with self._read() as conn:
             row = conn.execute("SELECT * FROM evaluations WHERE eval_id = ?", (eval_id,)).fetchone()
             if not row:
                 return None
             return self._row_to_eval(row)
 
     def list_evals(self, limit: int = 50, trace_id: Optional[str] = None) -> List[EvalResult]:
-        with self._conn() as conn:
+        with self._read() as conn:
             if trace_id:
                 rows = conn.execute(
                     "SELECT * FROM evaluations WHERE trace_id = ? ORDER BY created_at DESC LIMIT ?",
@@ -476,18 +787,13 @@ class SQLiteStore:
     # -- Discovery --
 
     def save_agent(self, agent: AgentRegistration) -> None:
-        with self._conn() as conn:
+        with self._write() as conn:
             conn.execute(
-                """INSERT OR REPLACE INTO agents
-                (agent_id, name, protocol, endpoint, capabilities, version,
-                 metadata, status, registered_at, last_heartbeat,
-                 heartbeat_interval_s, uptime_seconds, active_tasks,
-                 error_count_last_5m, memory_mb)
-                VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)""",
+                _SQL_INSERT_AGENT,
                 (
                     agent.agent_id, agent.name, agent.protocol, agent.endpoint,
-                    json.dumps(agent.capabilities), agent.version,
-                    json.dumps(agent.metadata),
+                    _dumps(agent.capabilities), agent.version,
+                    _dumps(agent.metadata),
                     agent.status.value if isinstance(agent.status, AgentStatus) else agent.status,
                     agent.registered_at, agent.last_heartbeat,
                     agent.heartbeat_interval_s, agent.uptime_seconds,
@@ -496,14 +802,14 @@ class SQLiteStore:
             )
 
     def get_agent(self, agent_id: str) -> Optional[AgentRegistration]:
-        with self._conn() as conn:
+        with self._read() as conn:
             row = conn.execute("SELECT * FROM agents WHERE agent_id = ?", (agent_id,)).fetchone()
             if not row:
                 return None
             return self._row_to_agent(row)
 
     def list_agents(self, status: Optional[str] = None, protocol: Optional[str] = None) -> List[AgentRegistration]:
-        with self._conn() as conn:
+        with self._read() as conn:
             query = "SELECT * FROM agents"
             params: list = []
             conditions = []
@@ -520,14 +826,14 @@ class SQLiteStore:
             return [self._row_to_agent(r) for r in rows]
 
     def delete_agent(self, agent_id: str) -> bool:
-        with self._conn() as conn:
+        with self._write() as conn:
             cursor = conn.execute("DELETE FROM agents WHERE agent_id = ?", (agent_id,))
             return cursor.rowcount > 0
 
     # -- Feature flags --
 
     def save_flag(self, flag: FeatureFlag) -> None:
-        with self._conn() as conn:
+        with self._write() as conn:
             conn.execute(
                 """INSERT OR REPLACE INTO feature_flags
                 (flag_id, agent_id, name, enabled, value, description, updated_at)
@@ -535,13 +841,13 @@ class SQLiteStore:
                 (
                     flag.flag_id, flag.agent_id, flag.name,
                     1 if flag.enabled else 0,
-                    json.dumps(flag.value) if flag.value is not None else None,
+                    _dumps(flag.value) if flag.value is not None else None,
                     flag.description, flag.updated_at,
                 ),
             )
 
     def get_flags(self, agent_id: str) -> List[FeatureFlag]:
-        with self._conn() as conn:
+        with self._read() as conn:
             rows = conn.execute(
                 "SELECT * FROM feature_flags WHERE agent_id = ? ORDER BY name ASC",
                 (agent_id,),
@@ -549,27 +855,27 @@ class SQLiteStore:
             return [self._row_to_flag(r) for r in rows]
 
     def delete_flag(self, flag_id: str) -> bool:
-        with self._conn() as conn:
+        with self._write() as conn:
             cursor = conn.execute("DELETE FROM feature_flags WHERE flag_id = ?", (flag_id,))
             return cursor.rowcount > 0
 
     # -- Parameters --
 
     def save_param(self, param: Parameter) -> None:
-        with self._conn() as conn:
+        with self._write() as conn:
             conn.execute(
                 """INSERT OR REPLACE INTO parameters
                 (param_id, agent_id, name, value, description, updated_at)
                 VALUES (?, ?, ?, ?, ?, ?)""",
                 (
                     param.param_id, param.agent_id, param.name,
-                    json.dumps(param.value) if param.value is not None else None,
+                    _dumps(param.value) if param.value is not None else None,
                     param.description, param.updated_at,
                 ),
             )
 
     def get_params(self, agent_id: str) -> List[Parameter]:
-        with self._conn() as conn:
+        with self._read() as conn:
             rows = conn.execute(
                 "SELECT * FROM parameters WHERE agent_id = ? ORDER BY name ASC",
                 (agent_id,),
@@ -577,24 +883,27 @@ class SQLiteStore:
             return [self._row_to_param(r) for r in rows]
 
     def delete_param(self, param_id: str) -> bool:
-        with self._conn() as conn:
+        with self._write() as conn:
             cursor = conn.execute("DELETE FROM parameters WHERE param_id = ?", (param_id,))
             return cursor.rowcount > 0
 
     # -- Sessions --
 
     def save_session(self, session: Session) -> None:
-        with self._conn() as conn:
+        with self._write() as conn:
             conn.execute(
-                """INSERT OR REPLACE INTO sessions
+                """INSERT INTO sessions
                 (session_id, agent_id, user_id, created_at, updated_at)
-                VALUES (?, ?, ?, ?, ?)""",
+                VALUES (?, ?, ?, ?, ?)
+                ON CONFLICT(session_id) DO UPDATE SET
+                    agent_id = excluded.agent_id, user_id = excluded.user_id,
+                    created_at = excluded.created_at, updated_at = excluded.updated_at""",
                 (session.session_id, session.agent_id, session.user_id,
                  session.created_at, session.updated_at),
             )
 
     def get_session(self, session_id: str) -> Optional[Session]:
-        with self._conn() as conn:
+        with self._read() as conn:
             row = conn.execute("SELECT * FROM sessions WHERE session_id = ?", (session_id,)).fetchone()
             if not row:
                 return None
@@ -605,7 +914,7 @@ class SQLiteStore:
             )
 
     def list_sessions(self, agent_id: Optional[str] = None, limit: int = 50) -> List[Session]:
-        with self._conn() as conn:
+        with self._read() as conn:
             if agent_id:
                 rows = conn.execute(
                     "SELECT * FROM sessions WHERE agent_id = ? ORDER BY updated_at DESC LIMIT ?",
@@ -623,26 +932,26 @@ class SQLiteStore:
             ]
 
     def delete_session(self, session_id: str) -> bool:
-        with self._conn() as conn:
+        with self._write() as conn:
             cursor = conn.execute("DELETE FROM sessions WHERE session_id = ?", (session_id,))
             return cursor.rowcount > 0
 
     def save_message(self, message: SessionMessage) -> None:
-        with self._conn() as conn:
+        with self._write() as conn:
             conn.execute(
-                """INSERT OR REPLACE INTO session_messages
+                """INSERT INTO session_messages
                 (message_id, session_id, role, content, trace_id, created_at)
-                VALUES (?, ?, ?, ?, ?, ?)""",
+                VALUES (?, ?, ?, ?, ?, ?)
+                ON CONFLICT(message_id) DO UPDATE SET
+                    session_id = excluded.session_id, role = excluded.role,
+                    content = excluded.content, trace_id = excluded.trace_id,
+                    created_at = excluded.created_at""",
                 (message.message_id, message.session_id, message.role,
                  message.content, message.trace_id, message.created_at),
             )
-            conn.execute(
-                "UPDATE sessions SET updated_at = ? WHERE session_id = ?",
-                (_utc_now(), message.session_id),
-            )
 
     def list_messages(self, session_id: str) -> List[SessionMessage]:
-        with self._conn() as conn:
+        with self._read() as conn:
             rows = conn.execute(
                 "SELECT * FROM session_messages WHERE session_id = ? ORDER BY created_at ASC",
                 (session_id,),
@@ -659,17 +968,20 @@ class SQLiteStore:
     # -- Eval Sets --
 
     def save_eval_set(self, eval_set: EvalSet) -> None:
-        with self._conn() as conn:
+        with self._write() as conn:
             conn.execute(
-                """INSERT OR REPLACE INTO eval_sets
+                """INSERT INTO eval_sets
                 (eval_set_id, name, agent_id, created_at)
-                VALUES (?, ?, ?, ?)""",
+                VALUES (?, ?, ?, ?)
+                ON CONFLICT(eval_set_id) DO UPDATE SET
+                    name = excluded.name, agent_id = excluded.agent_id,
+                    created_at = excluded.created_at""",
                 (eval_set.eval_set_id, eval_set.name, eval_set.agent_id,
                  eval_set.created_at),
             )
 
     def list_eval_sets(self, agent_id: Optional[str] = None) -> List[EvalSet]:
-        with self._conn() as conn:
+        with self._read() as conn:
             if agent_id:
                 rows = conn.execute(
                     "SELECT * FROM eval_sets WHERE agent_id = ? ORDER BY created_at DESC",
@@ -684,17 +996,17 @@ class SQLiteStore:
             ]
 
     def save_eval_case(self, case: EvalCase) -> None:
-        with self._conn() as conn:
+        with self._write() as conn:
             conn.execute(
                 """INSERT OR REPLACE INTO eval_cases
                 (case_id, eval_set_id, session_id, status, result, created_at)
                 VALUES (?, ?, ?, ?, ?, ?)""",
                 (case.case_id, case.eval_set_id, case.session_id,
-                 case.status, json.dumps(case.result or {}), case.created_at),
+                 case.status, _dumps(case.result or {}), case.created_at),
             )
 
     def list_eval_cases(self, eval_set_id: str) -> List[EvalCase]:
-        with self._conn() as conn:
+        with self._read() as conn:
             rows = conn.execute(
                 "SELECT * FROM eval_cases WHERE eval_set_id = ? ORDER BY created_at ASC",
                 (eval_set_id,),
@@ -703,7 +1015,7 @@ class SQLiteStore:
                 EvalCase(
                     case_id=r["case_id"], eval_set_id=r["eval_set_id"],
                     session_id=r["session_id"], status=r["status"],
-                    result=json.loads(r["result"]) if r["result"] else {},
+                    result=json_loads(r["result"]) if r["result"] else {},
                     created_at=r["created_at"],
                 )
                 for r in rows
@@ -713,43 +1025,58 @@ class SQLiteStore:
 
     @staticmethod
     def _row_to_trace(row: sqlite3.Row) -> Trace:
+        # Positional: rows are selected with _TRACE_COLUMNS.
+        (trace_id, agent_id, session_id, request_id, start_time, end_time,
+         duration_ms, status, metadata, span_count) = row[:10]
         return Trace(
-            trace_id=row["trace_id"],
-            agent_id=row["agent_id"],
-            session_id=row["session_id"],
-            request_id=row["request_id"],
-            start_time=row["start_time"],
-            end_time=row["end_time"],
-            duration_ms=row["duration_ms"],
-            status=row["status"],
-            metadata=json.loads(row["metadata"]) if row["metadata"] else {},
-            span_count=row["span_count"] or 0,
+            trace_id=trace_id,
+            agent_id=agent_id,
+            session_id=session_id,
+            request_id=request_id,
+            start_time=start_time,
+            end_time=end_time,
+            duration_ms=duration_ms,
+            status=status,
+            metadata=json_loads(metadata) if metadata else {},
+            span_count=span_count or 0,
+        )
+
+    @staticmethod
+    def _span_row(span: Span) -> tuple:
+        # Payload columns hold the encoded JSON bytes as BLOBs; rows written
+        # as TEXT by older versions decode the same way.
+        return (
+            span.span_id, span.trace_id, span.parent_span_id, span.name,
+            span.kind.value if isinstance(span.kind, SpanKind) else span.kind,
+            span.start_time, span.end_time, span.duration_ms, span.status,
+            json_dumps(span.attributes), json_dumps(span.events),
+            json_dumps(span.input_data) if span.input_data else None,
+            json_dumps(span.output_data) if span.output_data else None,
+            span.error, span.agent_id,
         )
 
     @staticmethod
     def _row_to_span(row: sqlite3.Row) -> Span:
-        from kiboup.studio.entities import SpanKind
-        kind_val = row["kind"]
-        try:
-            kind = SpanKind(kind_val)
-        except ValueError:
-            kind = SpanKind.CUSTOM
+        # Positional: rows are selected with _SPAN_COLUMNS.
+        (span_id, trace_id, parent_span_id, name, kind, start_time, end_time,
+         duration_ms, status, attributes, events, input_data, output_data,
+         error, agent_id) = row
         return Span(
-            span_id=row["span_id"],
-            trace_id=row["trace_id"],
-            parent_span_id=row["parent_span_id"],
-            name=row["name"],
-            kind=kind,
-            start_time=row["start_time"],
-            end_time=row["end_time"],
-            duration_ms=row["duration_ms"],
-            status=row["status"],
-            attributes=json.loads(row["attributes"]) if row["attributes"] else {},
-            events=json.loads(row["events"]) if row["events"] else [],
-            input_data=json.loads(row["input_data"]) if row["input_data"] else None,
-            output_data=json.loads(row["output_data"]) if row["output_data"] else None,
-            error=row["error"],
-            agent_id=row["agent_id"],
+            span_id=span_id,
+            trace_id=trace_id,
+            parent_span_id=parent_span_id,
+            name=name,
+            kind=_SPAN_KINDS.get(kind, SpanKind.CUSTOM),
+            start_time=start_time,
+            end_time=end_time,
+            duration_ms=duration_ms,
+            status=status,
+            attributes=json_loads(attributes) if attributes else {},
+            events=json_loads(events) if events else [],
+            input_data=json_loads(input_data) if input_data else None,
+            output_data=json_loads(output_data) if output_data else None,
+            error=error,
+            agent_id=agent_id,
         )
 
     @staticmethod
@@ -758,7 +1085,7 @@ class SQLiteStore:
             prompt_id=row["prompt_id"],
             name=row["name"],
             description=row["description"],
-            tags=json.loads(row["tags"]) if row["tags"] else [],
+            tags=json_loads(row["tags"]) if row["tags"] else [],
             active_version=row["active_version"],
             created_at=row["created_at"],
             updated_at=row["updated_at"],
@@ -771,9 +1098,9 @@ class SQLiteStore:
             prompt_id=row["prompt_id"],
             version=row["version"],
             content=row["content"],
-            model_config=json.loads(row["model_config"]) if row["model_config"] else {},
-            variables=json.loads(row["variables"]) if row["variables"] else [],
-            metadata=json.loads(row["metadata"]) if row["metadata"] else {},
+            model_config=json_loads(row["model_config"]) if row["model_config"] else {},
+            variables=json_loads(row["variables"]) if row["variables"] else [],
+            metadata=json_loads(row["metadata"]) if row["metadata"] else {},
             is_active=bool(row["is_active"]),
             created_at=row["created_at"],
         )
@@ -789,10 +1116,10 @@ class SQLiteStore:
             eval_id=row["eval_id"],
             trace_id=row["trace_id"],
             agent_id=row["agent_id"],
-            metrics=json.loads(row["metrics"]) if row["metrics"] else {},
+            metrics=json_loads(row["metrics"]) if row["metrics"] else {},
             status=status,
             error=row["error"],
-            details=json.loads(row["details"]) if row["details"] else {},
+            details=json_loads(row["details"]) if row["details"] else {},
             created_at=row["created_at"],
             completed_at=row["completed_at"],
         )
@@ -809,9 +1136,9 @@ class SQLiteStore:
             name=row["name"],
             protocol=row["protocol"],
             endpoint=row["endpoint"],
-            capabilities=json.loads(row["capabilities"]) if row["capabilities"] else [],
+            capabilities=json_loads(row["capabilities"]) if row["capabilities"] else [],
             version=row["version"],
-            metadata=json.loads(row["metadata"]) if row["metadata"] else {},
+            metadata=json_loads(row["metadata"]) if row["metadata"] else {},
             status=status,
             registered_at=row["registered_at"],
             last_heartbeat=row["last_heartbeat"],
@@ -829,7 +1156,7 @@ class SQLiteStore:
             agent_id=row["agent_id"],
             name=row["name"],
             enabled=bool(row["enabled"]),
-            value=json.loads(row["value"]) if row["value"] else None,
+            value=json_loads(row["value"]) if row["value"] else None,
             description=row["description"],
             updated_at=row["updated_at"],
         )
@@ -840,7 +1167,7 @@ class SQLiteStore:
             param_id=row["param_id"],
             agent_id=row["agent_id"],
             name=row["name"],
-            value=json.loads(row["value"]) if row["value"] else None,
+            value=json_loads(row["value"]) if row["value"] else None,
             description=row["description"],
             updated_at=row["updated_at"],
         )
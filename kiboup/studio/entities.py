@@ -18,6 +18,9 @@ class SpanKind(str, Enum):
     CUSTOM = "custom"
 
 
+_SPAN_KINDS = {kind.value: kind for kind in SpanKind}
+
+
 class AgentStatus(str, Enum):
     """Health status of a registered agent."""
 
@@ -58,7 +61,7 @@ def _new_id() -> str:
 # ---------------------------------------------------------------------------
 
 
-@dataclass
+@dataclass(slots=True)
 class Span:
     """A single span within a trace."""
 
@@ -83,7 +86,7 @@ class Span:
         return {k: v for k, v in raw.items() if v is not None}
 
 
-@dataclass
+@dataclass(slots=True)
 class Trace:
     """A complete trace grouping related spans."""
 
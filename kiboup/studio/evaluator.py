@@ -6,7 +6,7 @@ import os
 from typing import Any, Dict, List, Optional
 
 from kiboup.studio.db import SQLiteStore
-from kiboup.studio.entities import EvalMetric, EvalResult, EvalStatus, _new_id, _utc_now
+from kiboup.studio.entities import EvalMetric, EvalResult, EvalStatus, Span, _new_id, _utc_now
 
 _JUDGE_PROMPT = """You are an expert evaluator for AI agent responses.
 
@@ -46,8 +46,12 @@ class Evaluator:
         self,
         trace_id: str,
         metrics: Optional[List[str]] = None,
+        spans: Optional[List[Span]] = None,
     ) -> EvalResult:
-        """Run evaluation on a trace."""
+        """Run evaluation on a trace.
+
+        ``spans`` may be passed when the caller already fetched them.
+        """
         result = EvalResult(
             eval_id=_new_id(),
             trace_id=trace_id,
@@ -66,7 +70,8 @@ class Evaluator:
         result.agent_id = trace.agent_id
         self._store.save_eval(result)
 
-        spans = self._store.list_spans_by_trace(trace_id)
+        if spans is None:
+            spans = self._store.list_spans_by_trace(trace_id)
         requested_metrics = metrics or [m.value for m in EvalMetric]
 
         try:
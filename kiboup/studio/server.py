@@ -184,8 +184,24 @@ class KiboStudio(Starlette):
         limit = int(request.query_params.get("limit", 50))
         offset = int(request.query_params.get("offset", 0))
         agent_id = request.query_params.get("agent_id")
-        traces = self.store.list_traces(limit=limit, offset=offset, agent_id=agent_id)
-        return JSONResponse({"traces": [t.to_dict() for t in traces]})
+        before = request.query_params.get("before")
+        before_id = request.query_params.get("before_id")
+        if request.query_params.get("include_spans") in ("1", "true"):
+            rows = self.store.list_traces_with_spans(
+                limit=limit, offset=offset, agent_id=agent_id, before=before, before_id=before_id,
+            )
+            traces = [t for t, _ in rows]
+            items = [{**t.to_dict(), "spans": spans} for t, spans in rows]
+        else:
+            traces = self.store.list_traces(
+                limit=limit, offset=offset, agent_id=agent_id, before=before, before_id=before_id,
+            )
+            items = [t.to_dict() for t in traces]
+        next_before = None
+        if len(traces) == limit:
+            last = traces[-1]
+            next_before = {"before": last.start_time, "before_id": last.trace_id}
+        return JSONResponse({"traces": items, "next_before": next_before})
 
     async def _api_ingest_traces(self, request):
         payload = await request.json()
@@ -203,15 +219,16 @@ class KiboStudio(Starlette):
         trace = self.store.get_trace(trace_id)
         if not trace:
             return JSONResponse({"error": "Trace not found"}, status_code=404)
-        spans = self.store.list_spans_by_trace(trace_id)
         return JSONResponse({
             "trace": trace.to_dict(),
-            "spans": [s.to_dict() for s in spans],
+            "spans": [s.to_dict() for s in self.store.iter_spans_by_trace(trace_id)],
         })
 
     async def _api_list_spans(self, request):
         trace_id = request.path_params["trace_id"]
-        spans = self.store.list_spans_by_trace(trace_id)
+        if request.query_params.get("summary") in ("1", "true"):
+            return JSONResponse({"spans": self.store.list_span_summaries(trace_id)})
+        spans = self.store.iter_spans_by_trace(trace_id)
         return JSONResponse({"spans": [s.to_dict() for s in spans]})
 
     async def _api_get_span(self, request):
@@ -629,16 +646,26 @@ class KiboStudio(Starlette):
     async def _api_run_eval_set(self, request):
         eval_set_id = request.path_params["eval_set_id"]
         cases = self.store.list_eval_cases(eval_set_id)
-        results = []
+        pending = []
         for case in cases:
             messages = self.store.list_messages(case.session_id)
-            user_msgs = [m for m in messages if m.role == "user"]
-            assistant_msgs = [m for m in messages if m.role == "assistant"]
-            if not user_msgs:
+            if not any(m.role == "user" for m in messages):
                 continue
-            trace_ids = [m.trace_id for m in assistant_msgs if m.trace_id]
-            if trace_ids:
-                eval_result = self.evaluator.run_evaluation(trace_ids[0])
+            trace_id = next(
+                (m.trace_id for m in messages if m.role == "assistant" and m.trace_id),
+                None,
+            )
+            pending.append((case, trace_id))
+
+        spans_by_trace = self.store.list_spans_for_traces(
+            [trace_id for _, trace_id in pending if trace_id]
+        )
+        results = []
+        for case, trace_id in pending:
+            if trace_id:
+                eval_result = self.evaluator.run_evaluation(
+                    trace_id, spans=spans_by_trace.get(trace_id, []),
+                )
                 case.status = "completed"
                 case.result = eval_result.to_dict() if hasattr(eval_result, "to_dict") else {}
             else: